@@ -3,14 +3,122 @@
 Содержит функции для ресемплинга, конверсии форматов и нормализации.
 """
 
+import math
+import struct
+import functools
 import numpy as np
-from scipy.signal import resample
-from io import BytesIO
-import wave
-from typing import cast
+from scipy.signal import firwin, upfirdn
+from typing import List, Optional, Tuple, cast
 
+# soxr (libsoxr, C/SIMD) — основной ресемплер; без него используем polyphase upfirdn
+try:
+    import soxr
+except ImportError:
+    soxr = None
 
-def resample_audio(audio: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+# numba (опционально) — JIT-циклы для коротких WebSocket фреймов, где
+# накладные расходы NumPy dispatch дороже самой арифметики
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+# Ниже этого размера (сэмплов) используем JIT-цикл, выше — векторный NumPy (SIMD)
+_SMALL_BUFFER_SAMPLES = 4096
+
+if njit is not None:
+    @njit(cache=True, fastmath=True, boundscheck=False)
+    def _f32_to_i16(src, dst):
+        """float32 → int16 с округлением и насыщением (JIT цикл)."""
+        for i in range(src.shape[0]):
+            v = np.rint(src[i] * 32768.0)
+            if v > 32767.0:
+                v = 32767.0
+            elif v < -32768.0:
+                v = -32768.0
+            dst[i] = np.int16(v)
+
+    @njit(cache=True, fastmath=True, boundscheck=False, parallel=True)
+    def _f32_to_i16_par(src, dst):
+        """float32 → int16 одним проходом: min/max без ветвлений (векторизуется
+        в vminps/vmaxps), итерации распределены по потокам через prange."""
+        for i in prange(src.shape[0]):
+            dst[i] = np.int16(min(32767.0, max(-32768.0, np.rint(src[i] * 32768.0))))
+
+    @njit(cache=True, fastmath=True, boundscheck=False)
+    def _i16_to_f32(src, dst):
+        """int16 → float32 / 32768 (JIT цикл)."""
+        for i in range(src.shape[0]):
+            dst[i] = np.float32(src[i]) * np.float32(1.0 / 32768.0)
+
+    @njit(cache=True, fastmath=True, boundscheck=False)
+    def _i16_to_f32_peak(src, dst):
+        """int16 → float32 / 32768 + пик |x| за тот же проход (JIT цикл)."""
+        peak = 0
+        for i in range(src.shape[0]):
+            v = np.int32(src[i])
+            dst[i] = np.float32(v) * np.float32(1.0 / 32768.0)
+            if v < 0:
+                v = -v
+            if v > peak:
+                peak = v
+        return np.float32(peak) * np.float32(1.0 / 32768.0)
+
+
+@functools.lru_cache(maxsize=16)
+def _get_poly_filter(src_rate: int, dst_rate: int,
+                     num_taps_per_phase: int = 16,
+                     kaiser_beta: float = 5.0) -> Tuple[int, int, np.ndarray, int]:
+    """
+    Строит (один раз на пару частот) anti-alias FIR фильтр для polyphase ресемплинга.
+
+    Фильтр кэшируется через lru_cache: resample_audio вызывается на каждый
+    микрофонный чанк и каждый TTS выход, а построение Kaiser-окна для коротких
+    сигналов дороже самой фильтрации.
+
+    Алгоритм:
+        1. up = dst/g, down = src/g (g = gcd)
+        2. h = firwin(2 * taps_per_phase * max(up, down) + 1, 1/max(up, down), kaiser beta)
+        3. Умножаем h на up (компенсация усиления при вставке нулей)
+        4. Дополняем h нулями спереди, чтобы групповая задержка делилась на down
+
+    Args:
+        src_rate: Исходная частота
+        dst_rate: Целевая частота
+        num_taps_per_phase: Длина фильтра на одну фазу
+        kaiser_beta: Параметр окна Кайзера (5.0 ~ scipy resample_poly)
+
+    Returns:
+        (up, down, h, delay) — delay: сколько выходных семплов отрезать в начале
+    """
+    g = math.gcd(src_rate, dst_rate)
+    up = dst_rate // g
+    down = src_rate // g
+    max_rate = max(up, down)
+
+    h = firwin(2 * num_taps_per_phase * max_rate + 1, 1.0 / max_rate,
+               window=('kaiser', kaiser_beta)) * up
+
+    # Выравниваем задержку фильтра на сетку down (как в scipy resample_poly)
+    half_len = (len(h) - 1) // 2
+    n_pre_pad = down - half_len % down
+    h = np.concatenate((np.zeros(n_pre_pad), h))
+    delay = (half_len + n_pre_pad) // down
+
+    return up, down, h, delay
+
+
+# Fast path для горячих пар частот (микрофон 48→16 kHz, TTS 24→48 kHz и т.д.):
+# фильтры строятся при импорте — длиннее и с более глубоким подавлением
+# (64 тапа на фазу, kaiser 8.6), первый чанк сессии не платит за firwin
+_RATE_FAST_PATH = {
+    (src, dst): _get_poly_filter(src, dst, num_taps_per_phase=32, kaiser_beta=8.6)
+    for src, dst in ((48000, 16000), (16000, 48000), (24000, 48000))
+}
+
+
+def resample_audio(audio: np.ndarray, src_rate: int, dst_rate: int,
+                   quality: str = 'HQ') -> np.ndarray:
     """
     Ресемплирует аудио из одной частоты в другую.
     
@@ -21,15 +129,20 @@ def resample_audio(audio: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarra
     Алгоритм:
         1. Проверяем, нужен ли ресемплинг (src_rate == dst_rate?)
         2. Если частоты одинаковые → return audio (без изменений)
-        3. Если разные:
-           - Вычисляем новую длину: num_samples = len(audio) * dst_rate / src_rate
-           - Используем scipy.signal.resample(audio, num_samples)
-           - Возвращаем ресемплированный массив с исходным dtype
+        3. Если установлен soxr → soxr.resample(audio, src, dst, quality)
+        4. Иначе (fallback):
+           - Берём фильтр (up, down, h) из _RATE_FAST_PATH, если пара частот
+             горячая, иначе закэшированный через _get_poly_filter()
+           - Фильтруем через scipy.signal.upfirdn(h, audio, up, down) (polyphase FIR)
+           - Отрезаем задержку фильтра и обрезаем до ceil(len * up / down)
+        5. Возвращаем ресемплированный массив с исходным dtype
     
     Args:
         audio: Аудио массив (float32 или int16)
         src_rate: Исходная частота (например, 48000)
         dst_rate: Целевая частота (например, 16000)
+        quality: Качество soxr ('HQ' по умолчанию, 'QQ' для low-latency
+            микрофонного пути). Игнорируется в fallback режиме.
     
     Returns:
         Ресемплированное аудио той же размерности
@@ -42,22 +155,40 @@ def resample_audio(audio: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarra
         16000
     
     Note:
-        - Используем scipy.signal.resample (не librosa!)
+        - soxr — компилируемый C/SIMD ресемплер, быстрее и не хуже по качеству
+          чем scipy (librosa перешла на него по умолчанию)
+        - Fallback — polyphase upfirdn (не FFT resample!): FFT-вариант
+          катастрофически медленный на длинах с большими простыми множителями
+        - Фильтр fallback-а строится один раз на пару частот (lru_cache)
         - Работает с float32 и int16 автоматически
         - Сохраняет dtype исходного массива
     """
     # Проверяем, нужен ли ресемплинг
     if src_rate == dst_rate:
         return audio
+
+    # Основной путь: soxr
+    if soxr is not None:
+        resampled = soxr.resample(audio, src_rate, dst_rate, quality=quality)
+        return resampled.astype(audio.dtype, copy=False)
     
-    # Вычисляем новую длину
-    num_samples = int(len(audio) * dst_rate / src_rate)
+    # Предрассчитанный фильтр для горячих пар частот, иначе закэшированный
+    poly = _RATE_FAST_PATH.get((src_rate, dst_rate))
+    if poly is None:
+        poly = _get_poly_filter(src_rate, dst_rate)
+    up, down, h, delay = poly
+    num_samples = -(-len(audio) * up // down)  # ceil(len * up / down)
+
+    # Ресемплируем через polyphase фильтр
+    resampled: np.ndarray = cast(np.ndarray, upfirdn(h, audio, up=up, down=down))
 
-    # Ресемплируем через scipy
-    resampled: np.ndarray = cast(np.ndarray, resample(audio, num_samples))
+    # Убираем задержку фильтра и подгоняем точную длину
+    resampled = resampled[delay:delay + num_samples]
+    if len(resampled) < num_samples:
+        resampled = np.pad(resampled, (0, num_samples - len(resampled)))
 
     # Сохраняем исходный dtype
-    return resampled.astype(audio.dtype)
+    return resampled.astype(audio.dtype, copy=False)
 
 
 
@@ -71,9 +202,10 @@ def float32_to_int16(audio_float32: np.ndarray) -> np.ndarray:
         - Некоторые TTS модели (требуют int16)
     
     Алгоритм:
-        1. Умножаем на 32768 (максимальное значение int16)
-        2. Clip значения в диапазон [-32768, 32767]
-        3. Приводим к типу int16
+        1. Умножаем на 32768 (максимальное значение int16) → один float32 буфер
+        2. Clip значения в диапазон [-32768, 32767] (in-place, out=)
+        3. Округляем до ближайшего целого (in-place, out=)
+        4. Приводим к типу int16
     
     Args:
         audio_float32: Аудио массив float32, значения [-1.0, 1.0]
@@ -82,7 +214,15 @@ def float32_to_int16(audio_float32: np.ndarray) -> np.ndarray:
         Аудио массив int16
     
     Formula:
-        int16_value = np.clip(float32_value * 32768, -32768, 32767).astype(np.int16)
+        int16_value = np.rint(np.clip(float32_value * 32768, -32768, 32767)).astype(np.int16)
+    
+    Note:
+        - Все шаги пишут в один промежуточный буфер (out=) — функция
+          memory-bound, поэтому меньше аллокаций = быстрее
+        - Округление (rint) вместо усечения: усечение смещало сигнал к нулю
+        - Короткие 1D буферы (< 4096 сэмплов) идут через numba JIT-цикл,
+          длинные — через параллельный branchless JIT-цикл (один проход по
+          памяти вместо трёх), если numba установлена
     
     Example:
         >>> audio_float = np.array([0.5, -0.8, 1.0])
@@ -90,9 +230,21 @@ def float32_to_int16(audio_float32: np.ndarray) -> np.ndarray:
         >>> print(audio_int)
         [16384 -26214 32767]
     """
-    # Умножаем на 32768 и clip в диапазон int16
-    audio_int16 = np.clip(audio_float32 * 32768, -32768, 32767).astype(np.int16)
-    return audio_int16
+    # numba: JIT-цикл прямо в выходной массив (короткие фреймы — однопоточный,
+    # длинные TTS выходы — параллельный)
+    if njit is not None and audio_float32.ndim == 1:
+        out = np.empty(audio_float32.shape, dtype=np.int16)
+        if audio_float32.size < _SMALL_BUFFER_SAMPLES:
+            _f32_to_i16(audio_float32, out)
+        else:
+            _f32_to_i16_par(audio_float32, out)
+        return out
+
+    # Умножаем на 32768, clip и округляем в одном буфере
+    scaled = np.multiply(audio_float32, 32768.0, dtype=np.float32)
+    np.clip(scaled, -32768.0, 32767.0, out=scaled)
+    np.rint(scaled, out=scaled)
+    return scaled.astype(np.int16, copy=False)
 
 
 
@@ -123,13 +275,50 @@ def int16_to_float32(audio_int16: np.ndarray) -> np.ndarray:
         >>> audio_float = int16_to_float32(audio_int)
         >>> print(audio_float)
         [0.5 -0.8 0.99997]
+
+    Note:
+        - Короткие 1D буферы (< 4096 сэмплов) идут через numba JIT-цикл,
+          длинные — через параллельный branchless JIT-цикл (один проход по
+          памяти вместо трёх), если numba установлена
     """
+    # Короткие фреймы: JIT-цикл прямо в выходной массив
+    if njit is not None and audio_int16.ndim == 1 and audio_int16.size < _SMALL_BUFFER_SAMPLES:
+        out = np.empty(audio_int16.shape, dtype=np.float32)
+        _i16_to_f32(audio_int16, out)
+        return out
+
     # Конвертируем в float32 и нормализуем
     audio_float32 = audio_int16.astype(np.float32) / 32768.0
     return audio_float32
 
 
 
+def int16_to_float32_peak(audio_int16: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    int16_to_float32() + пиковая амплитуда |x| одним проходом по памяти.
+
+    Пик копится вызывающим кодом по чанкам фразы и передаётся в
+    normalize_audio(peak=...) — при финализации не нужен отдельный проход max/min.
+
+    Args:
+        audio_int16: Аудио массив int16 (1D)
+
+    Returns:
+        (audio_float32, peak) — peak в шкале float32 [0.0, 1.0]
+    """
+    if njit is not None and audio_int16.ndim == 1:
+        out = np.empty(audio_int16.shape, dtype=np.float32)
+        peak = _i16_to_f32_peak(audio_int16, out)
+        return out, float(peak)
+
+    # Без numba: пик считаем по int16 (вдвое меньше памяти, чем по float32)
+    audio_float32 = int16_to_float32(audio_int16)
+    if audio_int16.size == 0:
+        return audio_float32, 0.0
+    peak = max(int(audio_int16.max()), -int(audio_int16.min()))
+    return audio_float32, peak / 32768.0
+
+
 def audio_to_wav_bytes(audio: np.ndarray, sample_rate: int) -> bytes:
     """
     Конвертирует numpy массив в WAV bytes для отправки по сети.
@@ -140,16 +329,13 @@ def audio_to_wav_bytes(audio: np.ndarray, sample_rate: int) -> bytes:
         - Стандартный формат для аудио обмена
     
     Алгоритм:
-        1. Если audio float32 → конвертируем в int16 через float32_to_int16()
-        2. Создаём BytesIO буфер (виртуальный файл в памяти)
-        3. Открываем wave.open() в режиме записи ('wb')
-        4. Устанавливаем параметры WAV:
-           - nchannels = 1 (моно)
+        1. Если audio float → конвертируем в int16 через float32_to_int16()
+           (int16 от вызывающего кода используется как есть, без round-trip)
+        2. Собираем 44-байтовый RIFF/WAVE заголовок через struct.pack:
+           - PCM (format=1), nchannels = 1 (моно)
            - sampwidth = 2 (int16 = 2 байта)
            - framerate = sample_rate
-        5. Записываем audio.tobytes() в WAV
-        6. Закрываем wave файл
-        7. Возвращаем buffer.getvalue() → bytes
+        3. Склеиваем header и PCM буфер массива через b"".join (одна копия)
     
     Args:
         audio: Аудио массив (int16 или float32)
@@ -163,26 +349,185 @@ def audio_to_wav_bytes(audio: np.ndarray, sample_rate: int) -> bytes:
         >>> wav_bytes = audio_to_wav_bytes(audio, 16000)
         >>> print(f"WAV size: {len(wav_bytes)} bytes")
         WAV size: 50 bytes
+    
+    Note:
+        - Без wave/BytesIO: одна конверсия + одна склейка вместо трёх копий
+        - PCM передаётся в join как memoryview, без промежуточного tobytes()
+        - Байтовая раскладка идентична wave.open(...).writeframes() (Groq ждёт её же)
     """
-    # Конвертируем float32 → int16 если нужно
-    if audio.dtype == np.float32:
+    # Конвертируем float → int16 если нужно
+    if np.issubdtype(audio.dtype, np.floating):
         audio = float32_to_int16(audio)
 
-    # Создаём WAV в памяти
+    # PCM данные (little-endian int16) — view на буфер массива, без копии
+    pcm = memoryview(np.ascontiguousarray(audio.astype('<i2', copy=False))).cast('B')
+    n_bytes = pcm.nbytes
+
+    # RIFF/WAVE заголовок: моно, 16 bit PCM
+    header = struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + n_bytes, b'WAVE',
+        b'fmt ', 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+        b'data', n_bytes
+    )
+
+    return b"".join((header, pcm))
+
+
+def _wav_chunks(wav_bytes: bytes) -> Tuple[memoryview, int, int, int]:
+    """
+    Разбирает RIFF chunks WAV: находит 'fmt ' и 'data' (LIST/INFO и прочие пропускаем).
+
+    Returns:
+        (view, fmt_offset, data_offset, data_size) — view на весь буфер,
+        смещения тел chunk-ов и размер данных
+    """
+    view = memoryview(wav_bytes)
+    if len(view) < 12 or view[0:4] != b'RIFF' or view[8:12] != b'WAVE':
+        raise ValueError("Not a RIFF/WAVE buffer")
+
+    fmt_offset = None
+    offset = 12
+    while offset + 8 <= len(view):
+        chunk_id = view[offset:offset + 4]
+        (chunk_size,) = struct.unpack_from('<I', view, offset + 4)
+        body = offset + 8
+        if chunk_id == b'fmt ':
+            fmt_offset = body
+        elif chunk_id == b'data':
+            if fmt_offset is None:
+                break
+            # Потоковые writer-ы (ffmpeg pipe) пишут 0 / 0xFFFFFFFF — берём до конца буфера
+            data_size = min(chunk_size, len(view) - body) or len(view) - body
+            return view, fmt_offset, body, data_size
+        offset = body + chunk_size + (chunk_size & 1)  # chunk-и выровнены на 2 байта
+
+    raise ValueError("WAV buffer has no fmt/data chunk")
+
+
+def wav_duration(wav_bytes: bytes) -> float:
+    """
+    Длительность WAV по заголовку (RIFF chunks), без декодирования PCM.
+
+    Алгоритм:
+        1. Проверяем сигнатуру RIFF/WAVE
+        2. Идём по chunk-ам с offset 12: 'fmt ' → byte_rate,
+           'data' → размер данных (LIST/INFO и прочие пропускаем)
+        3. duration = data_size / byte_rate
+
+    Args:
+        wav_bytes: WAV файл в байтах (любой sample rate / каналы / разрядность)
+
+    Returns:
+        float: Длительность в секундах
+
+    Raises:
+        ValueError: Если это не WAV или нет fmt/data chunk
+
+    Note:
+        В отличие от (len - 44) / (rate * 2) не зависит от размера заголовка
+        и от того, совпадает ли rate с output_sample_rate из конфига.
+    """
+    view, fmt_offset, _, data_size = _wav_chunks(wav_bytes)
+    (byte_rate,) = struct.unpack_from('<I', view, fmt_offset + 8)
+    return data_size / byte_rate
+
+
+def wav_pcm16(wav_bytes: bytes) -> Tuple[memoryview, int, int]:
+    """
+    Достаёт сырые PCM s16le данные из WAV без копирования.
+
+    Args:
+        wav_bytes: WAV файл в байтах
+
+    Returns:
+        (pcm, sample_rate, channels) — pcm это memoryview на data chunk
+
+    Raises:
+        ValueError: Если это не WAV или формат не 16-bit integer PCM
+    """
+    view, fmt_offset, data_offset, data_size = _wav_chunks(wav_bytes)
+    audio_format, channels, sample_rate = struct.unpack_from('<HHI', view, fmt_offset)
+    (bits_per_sample,) = struct.unpack_from('<H', view, fmt_offset + 14)
+    # 0xFFFE = WAVE_FORMAT_EXTENSIBLE (subformat не проверяем — 16 бит всегда PCM)
+    if audio_format not in (1, 0xFFFE) or bits_per_sample != 16:
+        raise ValueError(f"Not 16-bit PCM (format={audio_format}, bits={bits_per_sample})")
+    frame_bytes = 2 * channels
+    data_size -= data_size % frame_bytes  # обрезанный хвост не должен ломать Int16Array на клиенте
+    return view[data_offset:data_offset + data_size], sample_rate, channels
+
+
+def concat_wav(wav_parts: List[bytes]) -> bytes:
+    """
+    Склеивает 16-bit PCM WAV фрагменты (одинаковый rate/каналы) в один WAV.
+
+    Args:
+        wav_parts: WAV файлы в байтах, в порядке воспроизведения
+
+    Returns:
+        WAV файл в байтах (один фрагмент возвращается как есть)
+
+    Raises:
+        ValueError: Если фрагмент не 16-bit PCM или форматы различаются
+    """
+    if len(wav_parts) == 1:
+        return wav_parts[0]
+
+    pcm_parts = []
+    fmt = None
+    for part in wav_parts:
+        pcm, sample_rate, channels = wav_pcm16(part)
+        if fmt is None:
+            fmt = (sample_rate, channels)
+        elif fmt != (sample_rate, channels):
+            raise ValueError(f"WAV format mismatch: {fmt} vs {(sample_rate, channels)}")
+        pcm_parts.append(pcm)
+
+    sample_rate, channels = fmt
+    n_bytes = sum(pcm.nbytes for pcm in pcm_parts)
+    header = struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + n_bytes, b'WAVE',
+        b'fmt ', 16, 1, channels, sample_rate, sample_rate * 2 * channels, 2 * channels, 16,
+        b'data', n_bytes
+    )
+    return b"".join((header, *pcm_parts))
+
+
+def audio_to_flac_bytes(audio: np.ndarray, sample_rate: int) -> bytes:
+    """
+    Конвертирует numpy массив в FLAC bytes (lossless, 16 bit PCM).
+    
+    Используется для:
+        - Groq Whisper API (принимает FLAC — для речи ~50% от размера WAV)
+    
+    Алгоритм:
+        1. Создаём BytesIO буфер
+        2. soundfile.write(buffer, audio, sample_rate, FLAC, PCM_16)
+           (soundfile принимает float32 напрямую — без int16 промежуточного массива)
+        3. Возвращаем buffer.getvalue()
+    
+    Args:
+        audio: Аудио массив (float32 или int16)
+        sample_rate: Частота дискретизации (например, 16000)
+    
+    Returns:
+        FLAC файл в виде байтов
+    
+    Raises:
+        ImportError: Если soundfile не установлен (вызывающий код
+            должен откатиться на audio_to_wav_bytes)
+    """
+    import soundfile as sf
+    from io import BytesIO
+
     buffer = BytesIO()
-    wav_file: wave.Wave_write = cast(wave.Wave_write, wave.open(buffer, 'wb'))
-    with wav_file:
-        wav_file.setnchannels(1)            # Моно
-        wav_file.setsampwidth(2)            # 2 bytes = int16
-        wav_file.setframerate(sample_rate)  # Частота
-        wav_file.writeframes(audio.tobytes())
-
-    # Возвращаем bytes
+    sf.write(buffer, audio, sample_rate, format='FLAC', subtype='PCM_16')
     return buffer.getvalue()
 
 
 
-def normalize_audio(audio: np.ndarray) -> np.ndarray:
+def normalize_audio(audio: np.ndarray, copy: bool = False, peak: Optional[float] = None) -> np.ndarray:
     """
     Нормализует громкость аудио (peak normalization).
     
@@ -193,13 +538,17 @@ def normalize_audio(audio: np.ndarray) -> np.ndarray:
         - Стандартизация уровня сигнала
     
     Алгоритм:
-        1. Находим максимальное абсолютное значение (peak)
+        1. Находим пик через max() и -min() (без промежуточного abs-массива)
         2. Если peak == 0 → возвращаем audio без изменений (тишина)
-        3. Если peak > 0 → делим весь массив на peak
+        3. Если peak > 0 → делим весь массив на peak (in-place, если copy=False)
         4. Результат: пик громкости становится ±1.0
     
     Args:
         audio: Аудио массив (float32)
+        copy: True → вернуть новый массив, False → нормализовать in-place
+            (по умолчанию; вызывающий код передаёт свежесобранные фразы)
+        peak: Уже известный пик |audio| (например, от int16_to_float32_peak()) —
+            тогда шаг 1 пропускается и остаётся один проход (деление)
     
     Returns:
         Нормализованное аудио (пик = ±1.0)
@@ -213,12 +562,18 @@ def normalize_audio(audio: np.ndarray) -> np.ndarray:
         >>> print(normalized)
         [0.333 -0.667 1.0]  # Пик теперь 1.0
     """
-    # Находим пиковое значение
-    peak = np.abs(audio).max()
+    # Находим пиковое значение (без материализации np.abs(audio))
+    if peak is None:
+        peak_pos = audio.max()
+        peak_neg = -audio.min()
+        peak = peak_pos if peak_pos > peak_neg else peak_neg
     
     # Если тишина → не нормализуем
     if peak == 0:
         return audio
     
     # Нормализуем к пику 1.0
-    return audio / peak
+    if copy:
+        return audio / peak
+    np.divide(audio, peak, out=audio)
+    return audio
@@ -3,11 +3,39 @@
 """
 
 import asyncio
+import hashlib
+from io import BytesIO
+import httpx
 from groq import Groq
 from typing import Dict, Any
 from app.config import load_config, get_api_key
 from app.monitoring.logger import setup_logger
-from app.components.audio_utils import audio_to_wav_bytes
+from app.components.retry import retry_wait
+from app.components.audio_utils import audio_to_wav_bytes, audio_to_flac_bytes
+
+# Process-wide Groq клиенты (один пул соединений на API ключ):
+# sha256(api_key) → Groq
+_shared_clients: Dict[str, Groq] = {}
+
+
+def _get_client(api_key: str) -> Groq:
+    """
+    Возвращает общий для процесса Groq клиент для api_key.
+
+    Вызовы идут из потоков asyncio.to_thread — httpx.Client потокобезопасен,
+    keep-alive соединения переиспользуются всеми GroqWhisperClient вместо
+    отдельного пула (и TLS handshake) на каждую сессию.
+    """
+    key = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+    client = _shared_clients.get(key)
+    if client is None:
+        http = httpx.Client(
+            limits=httpx.Limits(max_keepalive_connections=16, max_connections=32, keepalive_expiry=60),
+            timeout=httpx.Timeout(30.0, connect=5.0),
+        )
+        client = Groq(api_key=api_key, http_client=http)
+        _shared_clients[key] = client
+    return client
 
 
 class GroqWhisperClient:
@@ -25,14 +53,17 @@ class GroqWhisperClient:
         self.config = load_config()["models"]["whisper"]
         self.logger = setup_logger(__name__)
         
-        # API клиент
+        # API клиент (общий пул соединений процесса)
         api_key = get_api_key(self.config["api_key_env"])
-        self.client = Groq(api_key=api_key)
+        self.client = _get_client(api_key)
         
         # Параметры
         self.model = self.config["model"]
         self.language = self.config["language"]
         self.temperature = self.config["temperature"]
+
+        # Retry параметры (читаем один раз, а не на каждый запрос)
+        self._retry_cfg = load_config()["pipeline"]["retry"]
         
         self.logger.info(f"Groq Whisper client initialized: {self.model}")
     
@@ -47,26 +78,34 @@ class GroqWhisperClient:
             dict: {"text": "...", "language": "en"}
         
         Алгоритм:
-            1. Конвертируем numpy → WAV bytes
+            1. Конвертируем numpy → FLAC bytes (fallback: WAV)
             2. Пытаемся вызвать API с exponential backoff
             3. При ошибке повторяем до max_attempts
             4. Возвращаем результат или raise
         """
-        # Конвертируем в WAV
-        wav_bytes = audio_to_wav_bytes(audio_array, 16000)
+        # Конвертируем в FLAC (~50% от WAV → быстрее upload), WAV как fallback
+        try:
+            audio_bytes = audio_to_flac_bytes(audio_array, 16000)
+            audio_filename = "audio.flac"
+        except Exception as e:
+            self.logger.warning(f"FLAC encoding unavailable ({e}), falling back to WAV")
+            audio_bytes = audio_to_wav_bytes(audio_array, 16000)
+            audio_filename = "audio.wav"
         
+        # File-like объект создаём один раз — между попытками только seek(0)
+        audio_file = BytesIO(audio_bytes)
+        audio_file.name = audio_filename
+
         # Retry параметры из конфига
-        retry_config = load_config()["pipeline"]["retry"]
-        max_attempts = retry_config["max_attempts"]
-        backoff_factor = retry_config["backoff_factor"]
+        max_attempts = self._retry_cfg["max_attempts"]
+        backoff_base = self._retry_cfg.get("backoff_base", 0.5)
+        backoff_cap = self._retry_cfg.get("backoff_cap", 10.0)
         
         # Пытаемся с retry
         for attempt in range(max_attempts):
             try:
-                # Создаём file-like объект (каждый раз заново)
-                from io import BytesIO
-                audio_file = BytesIO(wav_bytes)
-                audio_file.name = "audio.wav"
+                # Перематываем буфер (предыдущая попытка могла его дочитать)
+                audio_file.seek(0)
                 
                 # Вызываем API с auto-detect language (убрали language=self.language для определения русского)
                 response = await asyncio.to_thread(
@@ -90,7 +129,7 @@ class GroqWhisperClient:
                 return result
                 
             except Exception as e:
-                wait_time = backoff_factor ** attempt
+                wait_time = retry_wait(attempt, backoff_base, backoff_cap)
                 self.logger.warning(
                     f"Groq API error (attempt {attempt + 1}/{max_attempts}): {e}. "
                     f"Retrying in {wait_time:.1f}s..."
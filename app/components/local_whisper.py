@@ -5,8 +5,9 @@
 
 import asyncio
 import numpy as np
-from faster_whisper import WhisperModel
-from typing import Dict, Any
+from faster_whisper import WhisperModel, BatchedInferencePipeline
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+from typing import Dict, Any, Optional
 from app.config import load_config
 from app.monitoring.logger import setup_logger
 
@@ -29,7 +30,8 @@ class LocalWhisperClient:
         # Параметры
         self.model_size = self.config.get("model_size", "large-v3")
         self.device = self.config.get("device", "cuda")
-        self.compute_type = self.config.get("compute_type", "float16")
+        # int8_float16: веса int8 (в 2 раза меньше VRAM трафика), активации fp16
+        self.compute_type = self.config.get("compute_type", "int8_float16")
         self.language = self.config.get("language", "en")
         self.gpu_id = self.config.get("gpu_id", 0)
 
@@ -37,8 +39,19 @@ class LocalWhisperClient:
         if self.device == "cpu":
             self.gpu_id = 0
 
-        # ВАЖНО: Mutex для CUDA операций (предотвращает race condition)
-        self._cuda_lock = asyncio.Lock()
+        # На GPU Python-обёртке CTranslate2 хватает 1 CPU потока (0 = default CTranslate2)
+        self.cpu_threads = self.config.get("cpu_threads", 1 if self.device == "cuda" else 0)
+
+        # Pre-VAD на CPU (до GPU очереди) — те же пороги, что и vad_filter ниже
+        self._vad_options = VadOptions(threshold=0.5, min_speech_duration_ms=250)
+
+        # Батчинг: сколько VAD-сегментов декодировать за один GPU шаг
+        self.batch_size = self.config.get("batch_size", 8)
+
+        # ВАЖНО: GPU вызовы идут через одну очередь + один consumer task
+        # (заменяет mutex: запросы, пришедшие во время GPU шага, забираются пачкой)
+        self._request_queue: Optional[asyncio.Queue] = None
+        self._batch_task: Optional[asyncio.Task] = None
 
 
         # Загружаем модель
@@ -48,10 +61,17 @@ class LocalWhisperClient:
             self.model_size,
             device=self.device,
             device_index=self.gpu_id,
-            compute_type=self.compute_type
+            compute_type=self.compute_type,
+            cpu_threads=self.cpu_threads
         )
 
-        self.logger.info(f"Local Whisper initialized: {self.model_size} on {self.device} (with CUDA mutex)")
+        # Batched pipeline: VAD-сегменты одного клипа декодируются одним батчем
+        self.batched_model = BatchedInferencePipeline(model=self.model)
+
+        self.logger.info(
+            f"Local Whisper initialized: {self.model_size} on {self.device} "
+            f"(batched pipeline, batch_size={self.batch_size})"
+        )
 
     async def transcribe(self, audio_array: np.ndarray) -> Dict[str, Any]:
         """
@@ -65,94 +85,176 @@ class LocalWhisperClient:
 
         Алгоритм:
             1. Преобразуем numpy array в формат для faster-whisper
-            2. Ждем освобождения CUDA lock (очередь)
-            3. Запускаем транскрипцию на GPU (монопольно)
-            4. При CUDA ошибке - retry с очисткой cache
-            5. Возвращаем результат
+            2. Silero VAD на CPU: нет речи → сразу пустой результат (GPU не трогаем)
+            3. Кладём (audio, future) в очередь GPU запросов
+            4. Consumer task (_batch_loop) выполняет запросы на GPU (монопольно)
+            5. Ждём future и возвращаем результат
         """
         # faster-whisper принимает numpy array напрямую
-        # Убеждаемся что это float32
-        if audio_array.dtype != np.float32:
+        # Убеждаемся что это float32 в диапазоне [-1.0, 1.0]
+        if audio_array.dtype == np.int16:
+            # int16 (WebSocket/RTP): конверсия + нормализация одним проходом
+            audio_array = np.multiply(audio_array, np.float32(1.0 / 32768.0), dtype=np.float32)
+        elif audio_array.dtype != np.float32:
             audio_array = audio_array.astype(np.float32)
 
+        # EARLY EXIT: тишина не будит GPU (VAD внутри faster-whisper работает
+        # уже внутри дорогого pipeline)
+        speech_timestamps = await asyncio.to_thread(
+            get_speech_timestamps, audio_array, self._vad_options
+        )
+        if not speech_timestamps:
+            self.logger.debug("Pre-VAD: no speech detected, skipping Whisper")
+            return {
+                "text": "",
+                "language": self.language,
+                "language_probability": 1.0,
+                "no_speech_prob": 1.0
+            }
+
+        self._ensure_batch_worker()
+
+        future = asyncio.get_running_loop().create_future()
+        await self._request_queue.put((audio_array, future))
+        return await future
+
+    def _ensure_batch_worker(self) -> None:
+        """Запускает consumer task (лениво — нужен работающий event loop)."""
+        if self._batch_task is None or self._batch_task.done():
+            self._request_queue = asyncio.Queue()
+            self._batch_task = asyncio.create_task(self._batch_loop())
+
+    async def _batch_loop(self) -> None:
+        """
+        Единственный потребитель очереди GPU запросов.
+
+        Алгоритм:
+            1. Ждём первый запрос
+            2. Без ожидания забираем всё, что накопилось за предыдущий GPU шаг
+               (до batch_size запросов)
+            3. Выполняем пачку подряд на GPU, резолвим future каждого вызывающего
+
+        Note:
+            faster-whisper батчит VAD-сегменты ВНУТРИ клипа (BatchedInferencePipeline),
+            но не умеет декодировать независимые клипы одним батчем без потери
+            per-clip VAD — поэтому запросы пачки выполняются последовательно.
+        """
+        while True:
+            batch = [await self._request_queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._request_queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            if len(batch) > 1:
+                self.logger.debug(f"Whisper batch: {len(batch)} queued requests")
+
+            for audio_array, future in batch:
+                if future.done():
+                    continue
+                try:
+                    result = await self._transcribe_with_retry(audio_array)
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+
+    async def _transcribe_with_retry(self, audio_array: np.ndarray) -> Dict[str, Any]:
+        """
+        Выполняет транскрипцию на GPU с retry при CUDA ошибках.
+
+        Вызывается ТОЛЬКО из _batch_loop (один GPU вызов за раз).
+        """
         # Retry параметры
         max_attempts = 3
         backoff_factor = 1.5
 
-        # КРИТИЧНО: Используем mutex для CUDA операций
-        # Только один батч за раз может использовать GPU
-        async with self._cuda_lock:
-            for attempt in range(max_attempts):
-                try:
-                    # Запускаем транскрипцию (синхронно, но через to_thread)
-                    # language=None для автоматического определения языка (нужно для блокировки русского)
-                    segments, info = await asyncio.to_thread(
-                        self.model.transcribe,
-                        audio_array,
-                        language="en",
-                        beam_size=1,                        # was 5 — lower hallucination rate + faster
-                        condition_on_previous_text=False,
-                        no_speech_threshold=0.45,
-                        compression_ratio_threshold=2.2,    # was default 2.4 — catches repetition/hallucination
-                        log_prob_threshold=-0.65,           # was -1.0 — reject low-confidence segments
-                        hallucination_silence_threshold=0.5, # skip segments that are mostly silence tokens
-                        vad_filter=True,
-                        vad_parameters=dict(
-                            threshold=0.5,
-                            min_speech_duration_ms=250,
-                            min_silence_duration_ms=700     # was 100ms — research: 700ms optimal
-                        )
-                    )
+        for attempt in range(max_attempts):
+            try:
+                # Запускаем транскрипцию (синхронно, но через to_thread)
+                segments, info = await asyncio.to_thread(
+                    self._run_batched_transcribe,
+                    audio_array
+                )
+
+                # Собираем текст из сегментов, пропускаем сегменты с высоким no_speech_prob
+                text_parts = []
+                max_no_speech_prob = 0.0
+                for segment in segments:
+                    seg_no_speech = getattr(segment, "no_speech_prob", 0.0)
+                    max_no_speech_prob = max(max_no_speech_prob, seg_no_speech)
+                    if seg_no_speech < 0.5:
+                        text_parts.append(segment.text.strip())
+
+                full_text = " ".join(text_parts).strip()
+
+                lang_prob = round(getattr(info, "language_probability", 1.0), 3)
+
+                result = {
+                    "text": full_text,
+                    "language": info.language,
+                    "language_probability": lang_prob,
+                    "no_speech_prob": round(max_no_speech_prob, 3)
+                }
 
-                    # Собираем текст из сегментов, пропускаем сегменты с высоким no_speech_prob
-                    text_parts = []
-                    max_no_speech_prob = 0.0
-                    for segment in segments:
-                        seg_no_speech = getattr(segment, "no_speech_prob", 0.0)
-                        max_no_speech_prob = max(max_no_speech_prob, seg_no_speech)
-                        if seg_no_speech < 0.5:
-                            text_parts.append(segment.text.strip())
-
-                    full_text = " ".join(text_parts).strip()
-
-                    lang_prob = round(getattr(info, "language_probability", 1.0), 3)
-
-                    result = {
-                        "text": full_text,
-                        "language": info.language,
-                        "language_probability": lang_prob,
-                        "no_speech_prob": round(max_no_speech_prob, 3)
-                    }
-
-                    self.logger.info(
-                        f"Transcribed: {len(result['text'])} chars "
-                        f"(lang: {info.language}, confidence: {lang_prob:.2f})"
+                self.logger.info(
+                    f"Transcribed: {len(result['text'])} chars "
+                    f"(lang: {info.language}, confidence: {lang_prob:.2f})"
+                )
+                return result
+
+            except Exception as e:
+                error_msg = str(e).lower()
+                is_cuda_error = "cuda" in error_msg or "gpu" in error_msg
+
+                if is_cuda_error and attempt < max_attempts - 1:
+                    wait_time = backoff_factor ** attempt
+                    self.logger.warning(
+                        f"CUDA error (attempt {attempt + 1}/{max_attempts}): {e}. "
+                        f"Clearing CUDA cache and retrying in {wait_time:.1f}s..."
                     )
-                    return result
 
-                except Exception as e:
-                    error_msg = str(e).lower()
-                    is_cuda_error = "cuda" in error_msg or "gpu" in error_msg
-
-                    if is_cuda_error and attempt < max_attempts - 1:
-                        wait_time = backoff_factor ** attempt
-                        self.logger.warning(
-                            f"CUDA error (attempt {attempt + 1}/{max_attempts}): {e}. "
-                            f"Clearing CUDA cache and retrying in {wait_time:.1f}s..."
-                        )
-
-                        # Очищаем CUDA cache
-                        try:
-                            import torch
-                            if torch.cuda.is_available():
-                                torch.cuda.empty_cache()
-                                # Синхронизируем GPU для устранения race conditions
-                                torch.cuda.synchronize(self.gpu_id)
-                                self.logger.debug(f"CUDA cache cleared on GPU {self.gpu_id}")
-                        except Exception as cache_error:
-                            self.logger.warning(f"Failed to clear CUDA cache: {cache_error}")
-
-                        await asyncio.sleep(wait_time)
-                    else:
-                        self.logger.error(f"Local Whisper error after {attempt + 1} attempts: {e}")
-                        raise
+                    # Очищаем CUDA cache
+                    try:
+                        import torch
+                        if torch.cuda.is_available():
+                            torch.cuda.empty_cache()
+                            # Синхронизируем GPU для устранения race conditions
+                            torch.cuda.synchronize(self.gpu_id)
+                            self.logger.debug(f"CUDA cache cleared on GPU {self.gpu_id}")
+                    except Exception as cache_error:
+                        self.logger.warning(f"Failed to clear CUDA cache: {cache_error}")
+
+                    await asyncio.sleep(wait_time)
+                else:
+                    self.logger.error(f"Local Whisper error after {attempt + 1} attempts: {e}")
+                    raise
+
+    def _run_batched_transcribe(self, audio_array: np.ndarray):
+        """
+        Синхронный вызов batched pipeline (выполняется в thread).
+
+        Генератор сегментов материализуем здесь же, чтобы декодирование
+        шло в worker thread, а не в event loop при итерации.
+        """
+        segments, info = self.batched_model.transcribe(
+            audio_array,
+            language="en",
+            beam_size=1,                        # was 5 — lower hallucination rate + faster
+            condition_on_previous_text=False,
+            no_speech_threshold=0.45,
+            compression_ratio_threshold=2.2,    # was default 2.4 — catches repetition/hallucination
+            log_prob_threshold=-0.65,           # was -1.0 — reject low-confidence segments
+            hallucination_silence_threshold=0.5, # skip segments that are mostly silence tokens
+            vad_filter=True,
+            vad_parameters=dict(
+                threshold=0.5,
+                min_speech_duration_ms=250,
+                min_silence_duration_ms=700     # was 100ms — research: 700ms optimal
+            ),
+            batch_size=self.batch_size
+        )
+        return list(segments), info
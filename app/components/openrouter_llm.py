@@ -3,10 +3,135 @@
 """
 
 import asyncio
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+import httpx
 from openai import AsyncOpenAI
-from typing import List, Dict, Any
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 from app.config import load_config, get_api_key
 from app.monitoring.logger import setup_logger
+from app.components.retry import retry_wait
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# HTTP/2 требует пакет h2 (httpx[http2]); без него — HTTP/1.1 keep-alive
+try:
+    import h2  # noqa: F401
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+# Process-wide AsyncOpenAI клиенты (один пул соединений на API ключ):
+# sha256(api_key) → (AsyncOpenAI, httpx.AsyncClient)
+_shared_clients: Dict[str, Tuple[AsyncOpenAI, httpx.AsyncClient]] = {}
+
+
+def _get_client(api_key: str) -> Tuple[AsyncOpenAI, httpx.AsyncClient, bool]:
+    """
+    Возвращает общий для процесса AsyncOpenAI клиент для api_key.
+
+    Свой пул соединений: keep-alive + HTTP/2 (параллельные translate()
+    мультиплексируются в одно соединение, без повторного TCP+TLS handshake).
+    Все OpenRouterClient (preload в main + BatchQueue каждой сессии)
+    переиспользуют его вместо открытия своего пула.
+
+    Returns:
+        (client, http_client, created) — created=True если клиент создан сейчас
+    """
+    key = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+    if key in _shared_clients:
+        client, http = _shared_clients[key]
+        return client, http, False
+
+    http = httpx.AsyncClient(
+        http2=_HTTP2_AVAILABLE,
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=60),
+        timeout=httpx.Timeout(30.0, connect=5.0),
+    )
+    client = AsyncOpenAI(
+        base_url=OPENROUTER_BASE_URL,
+        api_key=api_key,
+        http_client=http
+    )
+    _shared_clients[key] = (client, http)
+    return client, http, True
+
+
+# Статический system prompt — неизменный префикс каждого запроса
+# (провайдер может кэшировать его KV, см. prompt_cache в config.yaml)
+_SYSTEM_PROMPT = (
+    "You are a PROFESSIONAL SIMULTANEOUS INTERPRETER translating live speech to Russian.\n\n"
+    "CRITICAL RULES:\n"
+    "1. Translate ALL languages to Russian — English, French, Spanish, German, any language.\n"
+    "2. FAITHFUL translation: stay close to the original words and structure.\n"
+    "   DO NOT paraphrase, DO NOT invent content, DO NOT summarize.\n"
+    "3. Only adapt where a literal translation would be incomprehensible in Russian:\n"
+    "   - Idioms → translate to the Russian equivalent idiom (not word-by-word)\n"
+    "   - Ambiguous phrases → use context to pick the right meaning\n"
+    "4. You are CONTINUING an ongoing translation — use previous exchanges to understand context.\n"
+    "5. FRAGMENT BRIDGING: The input comes from speech-to-text in chunks. A chunk may start\n"
+    "   mid-sentence (e.g. 'to tell you, I had...' or 'finally woke up and...').\n"
+    "   - If the chunk starts WITHOUT a subject or context, restore it from previous exchanges.\n"
+    "     'to tell you...' → 'Если сказать тебе...' (add bridge word)\n"
+    "     'finally woke up...' → 'Я наконец проснулся...' (add subject from context)\n"
+    "     'causes paralysis...' → 'Это вызывает паралич...' (add 'это')\n"
+    "   - Do NOT invent new content. Only add the minimal word (я, это, он, и, но) needed\n"
+    "     so the Russian sounds like a continuous sentence a listener can understand.\n"
+    "   - If the chunk IS a complete sentence, translate it as-is. Do not add anything.\n"
+    "   Short fragment → short translation. Never expand beyond what was said.\n"
+    "6. Keep the SAME register/style as previous translations. Same length as original.\n"
+    "   Output flows as continuous narration — not disconnected fragments.\n"
+    "7. Natural spoken Russian grammar, but faithful to what was said.\n"
+    "8. PROFANITY: Replace with Russian euphemisms ('чёрт', 'блин', 'твою мать') — keep emotion.\n"
+    "9. INPUT IS SPEECH-TO-TEXT: May contain recognition errors (a wrong word that sounds similar\n"
+    "   to the real one). If 1-2 words clearly do not fit the grammar or meaning of the sentence —\n"
+    "   silently correct to the most likely intended word using surrounding context and previous\n"
+    "   translations. Do NOT flag corrections. Do NOT guess wildly — if unsure, translate as-is.\n"
+    "   IMPORTANT: A capitalized word at the START of a chunk (e.g. 'Baker', 'Driver', 'Officer')\n"
+    "   is almost certainly a common noun, NOT a person's name — the article was dropped by STT.\n"
+    "   Translate as the profession/role: Baker → пекарь, Driver → водитель, Officer → офицер.\n"
+    "10. CONTEXT AWARENESS: Study the recent EN+RU exchanges above carefully.\n"
+    "   - Determine if this is a MONOLOGUE (one speaker, continuous narration) or DIALOGUE (questions\n"
+    "     and answers, multiple perspectives). Tags [QUESTION], [REPLY], [DIALOGUE] may be present.\n"
+    "   - Maintain consistent register: if previous translations used 'ты', continue with 'ты'.\n"
+    "     If formal, stay formal. Do NOT switch between 'ты' and 'вы' without reason.\n"
+    "   - Preserve the personality and emotional tone from previous translations.\n"
+    "   - In dialogue: keep distinct voices — questions sound like questions, replies like replies.\n\n"
+    "Output ONLY the Russian translation, no explanations, no formatting."
+)
+
+# Маркер сегмента в батч-ответе ("### Segment 2")
+_SEGMENT_RE = re.compile(r"^\s*#{2,}\s*Segment\s+\d+\s*:?\s*$", re.MULTILINE | re.IGNORECASE)
+
+# Конец предложения в стриминговом ответе: . ! ? … (+ закрывающая кавычка/скобка) и пробел
+_SENTENCE_END_RE = re.compile(r"[.!?…]+[»\"')]*\s+")
+
+
+def _pop_sentences(buffer: str) -> Tuple[List[str], str]:
+    """
+    Отделяет завершённые предложения от хвоста буфера.
+
+    Returns:
+        (sentences, rest) — rest ещё может дописаться следующими токенами
+    """
+    sentences = []
+    start = 0
+    for match in _SENTENCE_END_RE.finditer(buffer):
+        sentence = buffer[start:match.end()].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = match.end()
+    return sentences, buffer[start:]
+
+
+def _split_sentences(text: str) -> List[str]:
+    """Режет готовый перевод на предложения (те же границы, что и в стриме)."""
+    sentences, rest = _pop_sentences(text)
+    rest = rest.strip()
+    return sentences + [rest] if rest else sentences
 
 
 class OpenRouterClient:
@@ -23,18 +148,79 @@ class OpenRouterClient:
         self.logger = setup_logger(__name__)
 
         api_key = get_api_key(self.config["api_key_env"])
-        self.client = AsyncOpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=api_key
-        )
+        self.client, self._http, client_created = _get_client(api_key)
 
         self.model = self.config["model"]
         self.temperature = self.config["temperature"]
         self.max_tokens = self.config["max_tokens"]
 
-        self.logger.info(f"OpenRouter client initialized: {self.model}")
+        # Retry параметры (читаем один раз, а не на каждый запрос)
+        self._retry_cfg = load_config()["pipeline"]["retry"]
+
+        # Сколько последних пар контекста максимум уходит в промпт
+        self.max_context_pairs = load_config()["pipeline"]["context_window"]
 
-    async def translate(self, text: str, context: List[Dict[str, str]] = None, topic: str = None) -> str:
+        # LRU кэш переводов: key → (timestamp, translation).
+        # Стриминговые субтитры часто повторяют один и тот же сегмент с тем же
+        # контекстом — dict lookup вместо сетевого round-trip (300-2000ms).
+        # При temperature <= 0.1 ответ детерминирован → записи живут бессрочно,
+        # иначе — cache_ttl секунд
+        self._cache: OrderedDict = OrderedDict()
+        self._cache_size = self.config.get("cache_size", 1024)
+        self._cache_ttl = None if self.temperature <= 0.1 else self.config.get("cache_ttl", 60.0)
+
+        # Prompt caching на стороне провайдера: system prompt отдаём content-блоком
+        # с cache_control (Anthropic/Gemini через OpenRouter) — повторные запросы
+        # в пределах ~5 минут платят ~10% за префикс и быстрее отдают первый токен.
+        # Переменная часть (контекст + текст) остаётся в user message
+        if self.config.get("prompt_cache", True):
+            self._system_message = {
+                "role": "system",
+                "content": [
+                    {"type": "text", "text": _SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}
+                ],
+            }
+        else:
+            self._system_message = {"role": "system", "content": _SYSTEM_PROMPT}
+
+        # Continuous batching: translate() вызовы, пришедшие в пределах
+        # batch_max_wait, уходят одним запросом (меньше HTTP round-trip-ов под нагрузкой)
+        batch_cfg = self.config.get("batching", {})
+        self._batch_enabled = batch_cfg.get("enabled", False)
+        self._batch_max_wait = batch_cfg.get("max_wait", 0.02)
+        self._batch_max_size = batch_cfg.get("max_batch", 8)
+        self._pending: Optional[asyncio.Queue] = None
+        self._batch_task = None
+        # Сильные ссылки на фоновые задачи (warm-up, пачки): asyncio держит
+        # задачи по weak ref, без этого задача может быть собрана GC на лету
+        self._background_tasks: set = set()
+
+        self.logger.info(f"OpenRouter client initialized: {self.model} (http2={_HTTP2_AVAILABLE})")
+
+        # Прогрев пула: соединение открывается при старте сервера, а не на
+        # первом translate() (~100ms connect+TLS вне критического пути).
+        # Общий пул уже прогрет тем, кто его создал
+        if client_created:
+            try:
+                self._spawn(asyncio.get_running_loop().create_task(self._warmup()))
+            except RuntimeError:
+                pass  # нет event loop (скрипты/тесты) — соединение откроется лениво
+
+    def _spawn(self, task: asyncio.Task) -> None:
+        """Держит ссылку на фоновую задачу до её завершения."""
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _warmup(self) -> None:
+        """Открывает соединение с OpenRouter лёгким HEAD запросом."""
+        try:
+            await self._http.head(f"{OPENROUTER_BASE_URL}/models")
+            self.logger.debug("OpenRouter connection pool warmed up")
+        except Exception as e:
+            self.logger.debug(f"OpenRouter warm-up failed (will connect lazily): {e}")
+
+    async def translate(self, text: str, context: List[Dict[str, str]] = None, topic: str = None,
+                        max_context_pairs: Optional[int] = None) -> str:
         """
         Переводит текст EN → RU используя multi-turn формат.
 
@@ -48,51 +234,39 @@ class OpenRouterClient:
             text: Английский текст для перевода
             context: Список пар {"en": ..., "ru": ...} — предыдущие переводы
             topic: Опциональная тема разговора
+            max_context_pairs: Сколько последних пар контекста отправить
+                (по умолчанию pipeline.context_window) — размер промпта и
+                латентность не растут вместе с историей
 
         Returns:
             str: Переведённый текст на русском
         """
-        system_prompt = (
-            "You are a PROFESSIONAL SIMULTANEOUS INTERPRETER translating live speech to Russian.\n\n"
-            "CRITICAL RULES:\n"
-            "1. Translate ALL languages to Russian — English, French, Spanish, German, any language.\n"
-            "2. FAITHFUL translation: stay close to the original words and structure.\n"
-            "   DO NOT paraphrase, DO NOT invent content, DO NOT summarize.\n"
-            "3. Only adapt where a literal translation would be incomprehensible in Russian:\n"
-            "   - Idioms → translate to the Russian equivalent idiom (not word-by-word)\n"
-            "   - Ambiguous phrases → use context to pick the right meaning\n"
-            "4. You are CONTINUING an ongoing translation — use previous exchanges to understand context.\n"
-            "5. FRAGMENT BRIDGING: The input comes from speech-to-text in chunks. A chunk may start\n"
-            "   mid-sentence (e.g. 'to tell you, I had...' or 'finally woke up and...').\n"
-            "   - If the chunk starts WITHOUT a subject or context, restore it from previous exchanges.\n"
-            "     'to tell you...' → 'Если сказать тебе...' (add bridge word)\n"
-            "     'finally woke up...' → 'Я наконец проснулся...' (add subject from context)\n"
-            "     'causes paralysis...' → 'Это вызывает паралич...' (add 'это')\n"
-            "   - Do NOT invent new content. Only add the minimal word (я, это, он, и, но) needed\n"
-            "     so the Russian sounds like a continuous sentence a listener can understand.\n"
-            "   - If the chunk IS a complete sentence, translate it as-is. Do not add anything.\n"
-            "   Short fragment → short translation. Never expand beyond what was said.\n"
-            "6. Keep the SAME register/style as previous translations. Same length as original.\n"
-            "   Output flows as continuous narration — not disconnected fragments.\n"
-            "7. Natural spoken Russian grammar, but faithful to what was said.\n"
-            "8. PROFANITY: Replace with Russian euphemisms ('чёрт', 'блин', 'твою мать') — keep emotion.\n"
-            "9. INPUT IS SPEECH-TO-TEXT: May contain recognition errors (a wrong word that sounds similar\n"
-            "   to the real one). If 1-2 words clearly do not fit the grammar or meaning of the sentence —\n"
-            "   silently correct to the most likely intended word using surrounding context and previous\n"
-            "   translations. Do NOT flag corrections. Do NOT guess wildly — if unsure, translate as-is.\n"
-            "   IMPORTANT: A capitalized word at the START of a chunk (e.g. 'Baker', 'Driver', 'Officer')\n"
-            "   is almost certainly a common noun, NOT a person's name — the article was dropped by STT.\n"
-            "   Translate as the profession/role: Baker → пекарь, Driver → водитель, Officer → офицер.\n"
-            "10. CONTEXT AWARENESS: Study the recent EN+RU exchanges above carefully.\n"
-            "   - Determine if this is a MONOLOGUE (one speaker, continuous narration) or DIALOGUE (questions\n"
-            "     and answers, multiple perspectives). Tags [QUESTION], [REPLY], [DIALOGUE] may be present.\n"
-            "   - Maintain consistent register: if previous translations used 'ты', continue with 'ты'.\n"
-            "     If formal, stay formal. Do NOT switch between 'ты' and 'вы' without reason.\n"
-            "   - Preserve the personality and emotional tone from previous translations.\n"
-            "   - In dialogue: keep distinct voices — questions sound like questions, replies like replies.\n\n"
-            "Output ONLY the Russian translation, no explanations, no formatting."
+
+        user_message = self._build_user_message(text, context, topic, max_context_pairs)
+
+        # Проверяем кэш
+        cache_key = self._cache_key(_SYSTEM_PROMPT, user_message)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            self.logger.info(f"Translation cache hit: {len(text)} -> {len(cached)} chars")
+            return cached
+
+        if self._batch_enabled:
+            translation = await self._submit_batched(user_message)
+        else:
+            translation = await self._complete(user_message)
+
+        context_count = min(len(context), max_context_pairs or self.max_context_pairs) if context else 0
+        self.logger.info(
+            f"Translated ({context_count} context pairs): "
+            f"{len(text)} -> {len(translation)} chars"
         )
+        self._cache_put(cache_key, translation)
+        return translation
 
+    def _build_user_message(self, text: str, context: Optional[List[Dict[str, str]]],
+                            topic: Optional[str], max_context_pairs: Optional[int]) -> str:
+        """Собирает user message: тема + последние пары контекста + bridge note + текст."""
         # Формируем один user message (не multi-turn — меньше overhead в API)
         user_message = ""
 
@@ -100,6 +274,7 @@ class OpenRouterClient:
             user_message += f"Session topic: {topic}\n\n"
 
         if context:
+            context = context[-(max_context_pairs or self.max_context_pairs):]
             context_lines = []
             for i, pair in enumerate(context):
                 context_lines.append(f"{i+1}. EN: {pair['en']}\n   RU: {pair['ru']}")
@@ -120,15 +295,112 @@ class OpenRouterClient:
 
         user_message += f"NOW TRANSLATE TO RUSSIAN:\n{text}"
 
+        return user_message
+
+    async def translate_stream(self, text: str, context: List[Dict[str, str]] = None, topic: str = None,
+                               max_context_pairs: Optional[int] = None) -> AsyncIterator[str]:
+        """
+        Как translate(), но отдаёт перевод по предложениям по мере генерации (SSE stream).
+
+        Вызывающий код может запускать TTS первого предложения, пока модель
+        ещё пишет остальные. Склеенные через пробел части == полный перевод.
+
+        Note:
+            - Кэш: hit отдаётся сразу (разбитым на предложения), полный ответ кэшируется
+            - Retry только пока ничего не отдано (иначе части продублируются)
+            - При batching.enabled стрим невозможен — переводим целиком через translate()
+        """
+        if self._batch_enabled:
+            translation = await self.translate(text, context, topic, max_context_pairs)
+            for sentence in _split_sentences(translation):
+                yield sentence
+            return
+
+        user_message = self._build_user_message(text, context, topic, max_context_pairs)
+        cache_key = self._cache_key(_SYSTEM_PROMPT, user_message)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            self.logger.info(f"Translation cache hit: {len(text)} -> {len(cached)} chars")
+            for sentence in _split_sentences(cached):
+                yield sentence
+            return
+
+        messages = [
+            self._system_message,
+            {"role": "user", "content": user_message}
+        ]
+        max_attempts = self._retry_cfg["max_attempts"]
+        backoff_base = self._retry_cfg.get("backoff_base", 0.5)
+        backoff_cap = self._retry_cfg.get("backoff_cap", 10.0)
+
+        parts: List[str] = []
+        for attempt in range(max_attempts):
+            pending = ""
+            try:
+                stream = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens,
+                    stream=True
+                )
+                async for event in stream:
+                    if not event.choices:
+                        continue
+                    pending += event.choices[0].delta.content or ""
+                    # Отдаём все завершённые предложения, хвост ждёт следующих токенов
+                    complete, pending = _pop_sentences(pending)
+                    for sentence in complete:
+                        parts.append(sentence)
+                        yield sentence
+                    if event.choices[0].finish_reason == "length":
+                        self.logger.warning(
+                            f"TRANSLATION TRUNCATED! max_tokens={self.max_tokens} not enough. "
+                            f"User message: {len(user_message)} chars"
+                        )
+                break
+
+            except Exception as e:
+                if parts or attempt == max_attempts - 1:
+                    self.logger.error(f"OpenRouter stream failed after {len(parts)} sentences: {e}")
+                    raise
+                wait_time = retry_wait(attempt, backoff_base, backoff_cap)
+                self.logger.warning(
+                    f"OpenRouter API error (attempt {attempt + 1}/{max_attempts}): {e}. "
+                    f"Retrying in {wait_time:.1f}s..."
+                )
+                await asyncio.sleep(wait_time)
+
+        pending = pending.strip()
+        if pending:
+            parts.append(pending)
+            yield pending
+
+        translation = " ".join(parts)
+        self.logger.info(f"Translated (streamed, {len(parts)} sentences): {len(text)} -> {len(translation)} chars")
+        self._cache_put(cache_key, translation)
+
+    async def _complete(self, user_message: str, max_tokens: Optional[int] = None) -> str:
+        """
+        Один chat completion запрос с retry логикой.
+
+        Args:
+            user_message: Содержимое user message (system prompt общий)
+            max_tokens: Лимит ответа (по умолчанию self.max_tokens)
+
+        Returns:
+            str: Ответ модели (strip)
+        """
+        max_tokens = max_tokens or self.max_tokens
         messages = [
-            {"role": "system", "content": system_prompt},
+            self._system_message,
             {"role": "user", "content": user_message}
         ]
 
         # Retry параметры
-        retry_config = load_config()["pipeline"]["retry"]
-        max_attempts = retry_config["max_attempts"]
-        backoff_factor = retry_config["backoff_factor"]
+        max_attempts = self._retry_cfg["max_attempts"]
+        backoff_base = self._retry_cfg.get("backoff_base", 0.5)
+        backoff_cap = self._retry_cfg.get("backoff_cap", 10.0)
 
         for attempt in range(max_attempts):
             try:
@@ -136,7 +408,7 @@ class OpenRouterClient:
                     model=self.model,
                     messages=messages,
                     temperature=self.temperature,
-                    max_tokens=self.max_tokens
+                    max_tokens=max_tokens
                 )
 
                 translation = response.choices[0].message.content.strip()
@@ -144,19 +416,14 @@ class OpenRouterClient:
 
                 if finish_reason == "length":
                     self.logger.warning(
-                        f"TRANSLATION TRUNCATED! max_tokens={self.max_tokens} not enough. "
-                        f"Input: {len(text)} chars, context pairs: {len(context) if context else 0}"
+                        f"TRANSLATION TRUNCATED! max_tokens={max_tokens} not enough. "
+                        f"User message: {len(user_message)} chars"
                     )
 
-                context_count = len(context) if context else 0
-                self.logger.info(
-                    f"Translated ({context_count} context pairs): "
-                    f"{len(text)} -> {len(translation)} chars"
-                )
                 return translation
 
             except Exception as e:
-                wait_time = backoff_factor ** attempt
+                wait_time = retry_wait(attempt, backoff_base, backoff_cap)
                 self.logger.warning(
                     f"OpenRouter API error (attempt {attempt + 1}/{max_attempts}): {e}. "
                     f"Retrying in {wait_time:.1f}s..."
@@ -167,3 +434,103 @@ class OpenRouterClient:
                 else:
                     self.logger.error(f"OpenRouter API failed after {max_attempts} attempts")
                     raise
+
+    async def _submit_batched(self, user_message: str) -> str:
+        """Ставит запрос в очередь батчера и ждёт свой перевод."""
+        if self._batch_task is None or self._batch_task.done():
+            self._pending = asyncio.Queue()
+            self._batch_task = asyncio.create_task(self._batch_loop())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._pending.put((user_message, future))
+        return await future
+
+    async def _batch_loop(self) -> None:
+        """
+        Собирает translate() вызовы, пришедшие в пределах batch_max_wait,
+        в пачки до batch_max_size и отправляет каждую пачку одним запросом.
+
+        Пачка выполняется в отдельной задаче — сбор следующей не ждёт ответа API.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._pending.get()]
+            deadline = loop.time() + self._batch_max_wait
+            while len(batch) < self._batch_max_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._pending.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            self._spawn(asyncio.create_task(self._run_batch(batch)))
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        """
+        Выполняет пачку: K == 1 → обычный запрос; K > 1 → один запрос с
+        сегментами "### Segment i", ответ режется по тем же маркерам.
+        Если модель вернула не K сегментов — переводим каждый отдельно.
+        """
+        messages = [msg for msg, _ in batch]
+        try:
+            if len(batch) == 1:
+                results = [await self._complete(messages[0])]
+            else:
+                combined = (
+                    f"You will receive {len(batch)} INDEPENDENT translation requests.\n"
+                    f"Handle each one exactly as if it were sent alone (use only its own context).\n"
+                    f"Reply with exactly {len(batch)} blocks, each starting with its marker line "
+                    f"'### Segment N' followed by the Russian translation only.\n\n"
+                )
+                combined += "\n\n".join(
+                    f"### Segment {i + 1}\n{msg}" for i, msg in enumerate(messages)
+                )
+                response = await self._complete(combined, max_tokens=self.max_tokens * len(batch))
+                results = [part.strip() for part in _SEGMENT_RE.split(response)[1:]]
+
+                if len(results) != len(batch):
+                    self.logger.warning(
+                        f"Batched translation returned {len(results)}/{len(batch)} segments, "
+                        f"falling back to per-request calls"
+                    )
+                    results = await asyncio.gather(*(self._complete(msg) for msg in messages))
+                else:
+                    self.logger.debug(f"Batched translation: {len(batch)} requests in one call")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), translation in zip(batch, results):
+            if not future.done():
+                future.set_result(translation)
+
+    def _cache_key(self, system_prompt: str, user_message: str) -> str:
+        """sha256 от всего, что влияет на ответ модели."""
+        payload = json.dumps(
+            {"m": self.model, "t": self.temperature, "sys": system_prompt, "u": user_message},
+            sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _cache_get(self, key: str):
+        """Возвращает перевод из кэша (и поднимает его в LRU) или None."""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        ts, value = entry
+        if self._cache_ttl is not None and time.monotonic() - ts > self._cache_ttl:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return value
+
+    def _cache_put(self, key: str, value: str) -> None:
+        """Кладёт перевод в кэш, вытесняя самую старую запись при переполнении."""
+        self._cache[key] = (time.monotonic(), value)
+        self._cache.move_to_end(key)
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
@@ -0,0 +1,28 @@
+"""
+Общая логика ожидания между retry попытками внешних вызовов (API, TTS).
+"""
+
+import random
+
+
+def retry_wait(attempt: int, base: float = 0.5, cap: float = 10.0) -> float:
+    """
+    Capped exponential backoff с jitter.
+
+    Детерминированный backoff_factor ** attempt растёт без ограничения и
+    синхронизирует повторы параллельных воркеров (retry storm на upstream API).
+    Случайный множитель 0.5-1.5 разносит их во времени, cap ограничивает
+    худшее время восстановления.
+
+    Args:
+        attempt: Номер попытки (с 0)
+        base: Задержка первой попытки (секунды)
+        cap: Максимальная задержка до jitter (секунды)
+
+    Returns:
+        float: Время ожидания в секундах
+
+    Example:
+        >>> wait = retry_wait(2)  # min(10, 0.5 * 4) * U(0.5, 1.5) → 1.0..3.0
+    """
+    return min(cap, base * 2 ** attempt) * random.uniform(0.5, 1.5)
@@ -3,8 +3,11 @@
 Использует Silero VAD v5 для определения наличия речи в аудио.
 """
 
+import asyncio
+import concurrent.futures
 import torch
 import numpy as np
+from collections import deque
 from typing import Optional
 from app.config import load_config
 from app.monitoring.logger import setup_logger
@@ -33,18 +36,34 @@ class VADDetector:
         self.config = load_config()["pipeline"]["vad"]
         self.logger = setup_logger(__name__)
         
-        # Загружаем Silero VAD v5
-        self.model, utils = torch.hub.load(
-            repo_or_dir='snakers4/silero-vad',
-            model='silero_vad',
-            force_reload=False,
-            onnx=False
-        )
-        
         # ВАЖНО: Silero VAD v5 не поддерживает SM 12.0 (RTX 5060 Ti)
         # Используем CPU для VAD (быстро, <1ms на чанк)
         self.device = torch.device('cpu')
-        self.model.to(self.device)
+
+        # Загружаем Silero VAD v5. ONNX Runtime (CPU, 1 поток) вместо PyTorch
+        # eager: для маленькой RNN накладные расходы dispatcher-а больше самих
+        # вычислений. onnxruntime уже есть — его тянет faster-whisper
+        self.use_onnx = self.config.get("onnx", True)
+        try:
+            self.model, utils = torch.hub.load(
+                repo_or_dir='snakers4/silero-vad',
+                model='silero_vad',
+                force_reload=False,
+                onnx=self.use_onnx
+            )
+        except ImportError as e:
+            # Нет onnxruntime → PyTorch JIT модель
+            self.logger.warning(f"VAD ONNX backend unavailable ({e}), falling back to PyTorch")
+            self.use_onnx = False
+            self.model, utils = torch.hub.load(
+                repo_or_dir='snakers4/silero-vad',
+                model='silero_vad',
+                force_reload=False,
+                onnx=False
+            )
+
+        if not self.use_onnx:
+            self.model.to(self.device)
         
         # Параметры
         self.threshold = self.config["threshold"]
@@ -54,8 +73,27 @@ class VADDetector:
         # Счётчики фреймов
         self.speech_frames = 0
         self.silence_frames = 0
+
+        # Predictive early exit: последние вероятности речи. Если early_exit_frames
+        # подряд ниже early_exit_ratio * threshold — это уверенная тишина,
+        # финализируем фразу не дожидаясь полного min_silence_duration
+        self.early_exit_frames = self.config.get("early_exit_frames", 3)
+        self.early_exit_ratio = self.config.get("early_exit_ratio", 0.3)
+        self.recent_probs: deque = deque(maxlen=5)
+
+        # Переиспользуемый буфер для чанков не кратных 512 (вместо np.pad на
+        # каждый вызов); растёт при необходимости. Модель вызывается синхронно,
+        # поэтому общий буфер безопасен
+        self._pad_buf = np.zeros(4 * 512, dtype=np.float32)
+
+        # Выделенный поток для VAD: inference не блокирует event loop
+        # (translate/TTS ответы не ждут VAD), один поток сохраняет порядок
+        # чанков и делает общий _pad_buf безопасным
+        self._pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="vad", initializer=self._init_vad_thread
+        )
         
-        self.logger.info(f"VAD initialized on {self.device}")
+        self.logger.info(f"VAD initialized on {self.device} (backend: {'onnxruntime' if self.use_onnx else 'torch'})")
     
     def detect_speech(self, audio_chunk: np.ndarray) -> bool:
         """
@@ -69,32 +107,34 @@ class VADDetector:
         
         Note:
             Silero VAD v5 требует строго 512 samples для 16kHz.
-            Разбиваем большие чанки на окна по 512 samples.
+            Модель рекуррентная (состояние между окнами), поэтому окна идут
+            последовательно — батч (N, 512) дал бы N независимых потоков.
+            Чанк переводится в tensor один раз, окна — view без копий.
         """
         # Silero VAD v5 требует ровно 512 samples
         window_size = 512
-        
-        # Если чанк меньше окна - дополняем нулями
-        if len(audio_chunk) < window_size:
-            audio_chunk = np.pad(audio_chunk, (0, window_size - len(audio_chunk)))
-        
-        # Обрабатываем по окнам 512 samples
-        speech_probs = []
-        for i in range(0, len(audio_chunk), window_size):
-            window = audio_chunk[i:i+window_size]
-            
-            # Дополняем последнее окно если нужно
-            if len(window) < window_size:
-                window = np.pad(window, (0, window_size - len(window)))
-            
-            # VAD для этого окна
-            audio_tensor = torch.from_numpy(window).to(self.device)
-            with torch.no_grad():
-                prob = self.model(audio_tensor, 16000).item()
-            speech_probs.append(prob)
-        
-        # Усредняем вероятность по всем окнам
-        avg_prob = np.mean(speech_probs)
+
+        # Дополняем нулями до целого числа окон (минимум одно окно)
+        n_windows = max(1, -(-len(audio_chunk) // window_size))
+        padded_len = n_windows * window_size
+        if padded_len != len(audio_chunk):
+            if len(self._pad_buf) < padded_len:
+                self._pad_buf = np.zeros(padded_len, dtype=np.float32)
+            buf = self._pad_buf[:padded_len]
+            buf[:len(audio_chunk)] = audio_chunk
+            buf[len(audio_chunk):] = 0.0
+            audio_chunk = buf
+
+        # Один tensor на чанк, окна по порядку (state окна i-1 → окно i)
+        audio_tensor = torch.from_numpy(np.ascontiguousarray(audio_chunk, dtype=np.float32)).to(self.device)
+        with torch.no_grad():
+            probs = [
+                self.model(audio_tensor[i:i + window_size], 16000)
+                for i in range(0, padded_len, window_size)
+            ]
+            # Усредняем вероятность по всем окнам (одна синхронизация .item())
+            avg_prob = torch.cat(probs).mean().item()
+        self.recent_probs.append(avg_prob)
         
         # Проверяем threshold
         if avg_prob > self.threshold:
@@ -106,6 +146,31 @@ class VADDetector:
             self.speech_frames = 0
             return False
     
+    def _init_vad_thread(self) -> None:
+        """
+        Ограничивает intra-op параллелизм torch для маленькой RNN на CPU:
+        на 512-сэмпловом окне запуск потоков дороже самих вычислений.
+
+        ONNX backend уже работает в 1 поток (intra_op_num_threads=1 в Silero
+        OnnxWrapper). ВНИМАНИЕ: torch.set_num_threads — настройка процесса,
+        затрагивает и другой CPU torch код (GPU модели не затрагивает).
+        """
+        if not self.use_onnx:
+            torch.set_num_threads(self.config.get("torch_threads", 1))
+
+    async def detect_speech_async(self, audio_chunk: np.ndarray) -> bool:
+        """
+        detect_speech() в выделенном VAD потоке — для вызова из asyncio кода.
+
+        Args:
+            audio_chunk: Аудио массив (float32, 16kHz)
+
+        Returns:
+            bool: True если речь обнаружена, False если тишина
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self.detect_speech, audio_chunk)
+
     def is_silence_ready(self) -> bool:
         """
         Проверяет, достаточно ли накопилось тишины для финализации фразы.
@@ -119,9 +184,26 @@ class VADDetector:
         Note:
             min_silence_duration из конфига определяет порог.
             При 100ms чанках: 1.5s = 15 фреймов тишины.
+            Раньше порога возвращает True, если последние early_exit_frames
+            вероятностей все ниже early_exit_ratio * threshold (0 — выключено).
         """
         min_silence_frames = int(self.min_silence_duration * 10)
-        return self.silence_frames >= min_silence_frames
+        if self.silence_frames >= min_silence_frames:
+            return True
+
+        # Predictive early exit: явный спад речи → не ждём весь хвост тишины
+        k = self.early_exit_frames
+        if 0 < k <= len(self.recent_probs) and self.silence_frames >= k:
+            cutoff = self.early_exit_ratio * self.threshold
+            return all(p < cutoff for p in list(self.recent_probs)[-k:])
+        return False
+
+    def close(self) -> None:
+        """
+        Останавливает VAD поток. Вызывать при завершении сессии: поток держит
+        ссылку на детектор (initializer), без shutdown он и модель не освобождаются.
+        """
+        self._pool.shutdown(wait=False, cancel_futures=True)
 
     def reset(self) -> None:
         """
@@ -130,3 +212,4 @@ class VADDetector:
         """
         self.speech_frames = 0
         self.silence_frames = 0
+        self.recent_probs.clear()
@@ -2,6 +2,8 @@
 Модуль для работы с XTTS-v2 (Text-to-Speech).
 """
 
+import asyncio
+import logging
 import torch
 import numpy as np
 
@@ -59,9 +61,10 @@ except Exception as e:
     print(f"Warning: Failed to patch GPT2InferenceModel: {e}")
 
 from TTS.api import TTS
-from typing import Optional
+from typing import Optional, Tuple
 from app.config import load_config
 from app.monitoring.logger import setup_logger
+from app.components.retry import retry_wait
 from app.components.audio_utils import float32_to_int16, audio_to_wav_bytes, resample_audio
 
 
@@ -134,12 +137,136 @@ class XTTSEngine:
             # XTTS vocal temperature (0.1 = stable/consistent pace, 0.85 = default creative/variable)
             self.temperature = self.config.get("temperature", 0.85)
 
+            # Retry параметры (читаем один раз, а не на каждый запрос)
+            self._retry_cfg = load_config()["pipeline"]["retry"]
+
+            # Точность GPT части: fp32 (по умолчанию) / fp16 / bf16.
+            # GPT — compute-bound матричные умножения, в половинной точности
+            # вдвое меньше трафика весов и Tensor Cores; HiFi-GAN остаётся в fp32
+            self._amp_dtype = {"fp16": torch.float16, "bf16": torch.bfloat16}.get(
+                self.config.get("precision", "fp32")
+            )
+            if self._amp_dtype is not None and self.device != "cuda":
+                self.logger.warning("[XTTS] Half precision requires CUDA, staying in fp32")
+                self._amp_dtype = None
+            if self._amp_dtype is not None:
+                self._setup_half_precision()
+
+            # Speaker conditioning latents — считаем один раз на голос
+            # (voice_sample может смениться через set_voice → пересчёт лениво)
+            self._latents_voice = None
+            self._gpt_latent = None
+            self._speaker_emb = None
+            self._conditioning_latents()
+
+            # Опционально: torch.compile HiFi-GAN декодера (fused pointwise ops,
+            # меньше kernel launch overhead при batch=1). dynamic=True — длина
+            # latent-последовательности меняется от фразы к фразе
+            if self.config.get("torch_compile", False):
+                self._compile_decoder()
+
             self.logger.info(f"XTTS engine initialized on {self.device}:{self.gpu_id} (output: {self.output_sample_rate}Hz, speed: {self.speed}x, temperature: {self.temperature})")
 
         except Exception as e:
             self.logger.error(f"XTTS initialization failed: {type(e).__name__}: {e}", exc_info=True)
             raise
     
+    def _compile_decoder(self) -> None:
+        """
+        Оборачивает HiFi-GAN декодер XTTS в torch.compile и прогревает модель.
+
+        mode="reduce-overhead" дополнительно захватывает CUDA Graph и убирает
+        kernel launch overhead, но граф записывается на каждую новую длину
+        latents (в inference_stream она растёт от фрагмента к фрагменту) —
+        поэтому по умолчанию "default".
+
+        Компиляция ленивая — первый синтез после неё занимает десятки
+        секунд, поэтому делаем warm-up синтез здесь, вне latency-critical пути.
+        При любой ошибке остаёмся на eager PyTorch.
+        """
+        try:
+            tts_model = self.model.synthesizer.tts_model
+            mode = self.config.get("torch_compile_mode", "default")
+            tts_model.hifigan_decoder = torch.compile(
+                tts_model.hifigan_decoder, mode=mode, dynamic=True, fullgraph=False
+            )
+            self.logger.info(f"[XTTS] torch.compile (mode={mode}) applied to hifigan_decoder, warming up...")
+            self._infer("Прогрев.")
+            self.logger.info("[XTTS] torch.compile warm-up done")
+        except Exception as e:
+            self.logger.warning(f"[XTTS] torch.compile unavailable, using eager mode: {e}")
+
+    def _autocast(self):
+        """autocast контекст для GPT части (no-op в fp32 режиме)."""
+        return torch.autocast(
+            device_type="cuda",
+            dtype=self._amp_dtype or torch.float16,
+            enabled=self._amp_dtype is not None,
+        )
+
+    def _setup_half_precision(self) -> None:
+        """
+        Переводит веса GPT в fp16/bf16, HiFi-GAN декодер оставляет в fp32.
+
+        Декодер маленький и чувствителен к точности: его forward выполняется
+        с выключенным autocast, входные latents приводятся к float32.
+        """
+        tts_model = self.model.synthesizer.tts_model
+        tts_model.gpt = tts_model.gpt.to(self._amp_dtype)
+
+        decoder = tts_model.hifigan_decoder
+        decoder_forward = decoder.forward
+
+        def _fp32_forward(latents, g=None):
+            with torch.autocast(device_type="cuda", enabled=False):
+                return decoder_forward(latents.float(), g=None if g is None else g.float())
+
+        decoder.forward = _fp32_forward
+        self.logger.info(f"[XTTS] GPT running in {self._amp_dtype}, HiFi-GAN decoder in fp32")
+
+    def _conditioning_latents(self) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Возвращает (gpt_cond_latent, speaker_embedding) для текущего voice_sample.
+
+        Высокоуровневый TTS.tts() перечитывает WAV и гоняет speaker encoder на
+        каждый вызов; здесь результат кэшируется до смены voice_sample.
+        Параметры референса берутся из конфига модели — как внутри TTS.tts().
+        """
+        if self._latents_voice != self.voice_sample:
+            tts_model = self.model.synthesizer.tts_model
+            model_cfg = tts_model.config
+            with torch.inference_mode(), self._autocast():
+                self._gpt_latent, self._speaker_emb = tts_model.get_conditioning_latents(
+                    audio_path=self.voice_sample,
+                    gpt_cond_len=model_cfg.gpt_cond_len,
+                    gpt_cond_chunk_len=model_cfg.gpt_cond_chunk_len,
+                    max_ref_length=model_cfg.max_ref_len,
+                    sound_norm_refs=model_cfg.sound_norm_refs,
+                )
+            self._latents_voice = self.voice_sample
+            self.logger.info(f"[XTTS] Conditioning latents computed for {self.voice_sample}")
+        return self._gpt_latent, self._speaker_emb
+
+    def _infer(self, text: str) -> np.ndarray:
+        """
+        Синхронный синтез через Xtts.inference (вызывать через to_thread).
+
+        В обход TTS.tts(): тот на каждый вызов перечитывает voice_sample и
+        пересчитывает speaker latents (~100ms GPU), здесь они из кэша.
+        """
+        gpt_latent, speaker_emb = self._conditioning_latents()
+        with torch.inference_mode(), self._autocast():
+            out = self.model.synthesizer.tts_model.inference(
+                text,
+                self.language,
+                gpt_latent,
+                speaker_emb,
+                temperature=self.temperature,  # Vocal variability (0.1 = stable, 0.85 = default)
+                speed=self.speed,              # Speed multiplier (1.0 = normal, max ~2.0 before distortion)
+                enable_text_splitting=False,   # No inter-sentence pauses (synthesize as one chunk)
+            )
+        return out["wav"]
+
     async def synthesize(self, text: str) -> bytes:
         """
         Синтезирует русскую речь из текста с retry логикой.
@@ -148,75 +275,66 @@ class XTTSEngine:
             text: Русский текст для озвучки
         
         Returns:
-            bytes: WAV audio в бинарном формате (24kHz)
-        
+            bytes: WAV audio в бинарном формате (output_sample_rate)
+        """
+        audio_array = await self._synthesize_audio(text)
+        wav_bytes = audio_to_wav_bytes(audio_array, self.output_sample_rate)
+
+        self.logger.info(f"Synthesized: {len(text)} chars → {len(wav_bytes)} bytes ({self.output_sample_rate}Hz)")
+        return wav_bytes
+
+    async def _synthesize_audio(self, text: str) -> np.ndarray:
+        """
+        Синтез с retry логикой: float32 массив на output_sample_rate.
+
         Алгоритм:
-            1. Вызываем TTS модель с voice cloning
+            1. Вызываем XTTS inference с закэшированными speaker latents
             2. При ошибке повторяем с exponential backoff
             3. Получаем numpy массив
-            4. Конвертируем в WAV bytes
-            5. Возвращаем результат
+            4. Ресемплируем в output_sample_rate при необходимости
         """
         self.logger.info(f"Starting synthesis: {len(text)} chars, first 100 chars: {text[:100]}")
 
         # Retry параметры из конфига
-        retry_config = load_config()["pipeline"]["retry"]
-        max_attempts = retry_config["max_attempts"]
-        backoff_factor = retry_config["backoff_factor"]
+        max_attempts = self._retry_cfg["max_attempts"]
+        backoff_base = self._retry_cfg.get("backoff_base", 0.5)
+        backoff_cap = self._retry_cfg.get("backoff_cap", 10.0)
+
+        # str в Python уже Unicode — чистка невалидных символов (одиночные
+        # surrogate-ы, Windows charmap issue) только если упали на кодировке
+        text_normalized = text
+        debug = self.logger.isEnabledFor(logging.DEBUG)
 
         # Пытаемся с retry
         for attempt in range(max_attempts):
             try:
-                self.logger.debug(f"Synthesis attempt {attempt + 1}/{max_attempts}")
-
-                # Нормализуем текст в UTF-8 (fix Windows charmap encoding issue)
-                if isinstance(text, str):
-                    # Убеждаемся что текст корректно обрабатывается как UTF-8
-                    text_normalized = text.encode('utf-8', errors='ignore').decode('utf-8')
-                    self.logger.debug(f"Text normalized: {len(text_normalized)} chars")
-                else:
-                    text_normalized = text
+                if debug:
+                    self.logger.debug(f"Synthesis attempt {attempt + 1}/{max_attempts}")
+                    self.logger.debug(f"Calling XTTS inference with voice_sample={self.voice_sample}, language={self.language}")
 
                 # Синтез через XTTS
-                import asyncio
-                self.logger.debug(f"Calling TTS with voice_sample={self.voice_sample}, language={self.language}")
-
-                # Build TTS arguments
-                tts_kwargs = {
-                    "text": text_normalized,
-                    "language": self.language,
-                    "speed": self.speed,          # Speed multiplier (1.0 = normal, max ~2.0 before distortion)
-                    "temperature": self.temperature,  # Vocal variability (0.1 = stable, 0.85 = default)
-                    "split_sentences": False,     # No inter-sentence pauses (synthesize as one chunk)
-                }
-
-                # Only add speaker_wav if voice_sample is not None
-                if self.voice_sample is not None:
-                    tts_kwargs["speaker_wav"] = self.voice_sample
-
-                audio_array = await asyncio.to_thread(
-                    self.model.tts,
-                    **tts_kwargs
-                )
-                self.logger.debug(f"TTS returned audio array: shape={np.array(audio_array).shape if hasattr(audio_array, '__len__') else 'scalar'}")
-                
-                # Конвертируем в numpy если нужно
-                if not isinstance(audio_array, np.ndarray):
-                    audio_array = np.array(audio_array, dtype=np.float32)
+                audio_array = await asyncio.to_thread(self._infer, text_normalized)
+
+                # Конвертируем в numpy float32 (без копии, если уже совместим)
+                audio_array = np.asarray(audio_array, dtype=np.float32)
+                if debug:
+                    self.logger.debug(f"TTS returned audio array: shape={audio_array.shape}")
 
                 # Resample if output_sample_rate != 24000 (native XTTS rate)
                 if self.output_sample_rate != 24000:
                     audio_array = resample_audio(audio_array, 24000, self.output_sample_rate)
-                    self.logger.debug(f"Resampled: 24kHz → {self.output_sample_rate}Hz")
-
-                # Конвертируем в WAV bytes
-                wav_bytes = audio_to_wav_bytes(audio_array, self.output_sample_rate)
+                    if debug:
+                        self.logger.debug(f"Resampled: 24kHz → {self.output_sample_rate}Hz")
 
-                self.logger.info(f"Synthesized: {len(text)} chars → {len(wav_bytes)} bytes ({self.output_sample_rate}Hz)")
-                return wav_bytes
+                return audio_array
                 
             except Exception as e:
-                wait_time = backoff_factor ** attempt
+                if isinstance(e, UnicodeError) and isinstance(text, str):
+                    # Выкидываем невалидные для UTF-8 символы и пробуем снова
+                    text_normalized = text.encode('utf-8', errors='ignore').decode('utf-8')
+                    self.logger.debug(f"Text normalized: {len(text_normalized)} chars")
+
+                wait_time = retry_wait(attempt, backoff_base, backoff_cap)
                 self.logger.warning(
                     f"XTTS synthesis error (attempt {attempt + 1}/{max_attempts}): {e}. "
                     f"Retrying in {wait_time:.1f}s..."
@@ -5,34 +5,48 @@
 
 import yaml
 import os
+import functools
 from pathlib import Path
-from typing import Dict, Any, Optional
+from types import MappingProxyType
+from typing import Dict, Any, Mapping
 from dotenv import load_dotenv
 
+# libyaml (C) парсер если PyYAML собран с ним, иначе pure-Python
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+
 # Пути к файлам конфигурации
 CONFIG_PATH = Path(__file__).parent.parent / "config.yaml"
 ENV_PATH = Path(__file__).parent.parent / ".env"
 
-# Кэш конфигурации (загружается 1 раз)
-_config_cache: Optional[Dict[str, Any]] = None
+
+def _freeze(value: Any) -> Any:
+    """Рекурсивно делает конфиг read-only: dict → MappingProxyType, list → tuple."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
 
 
-def load_config() -> Dict[str, Any]:
+@functools.lru_cache(maxsize=1)
+def load_config() -> Mapping[str, Any]:
     """
     Загружает конфигурацию из config.yaml с кэшированием.
     
     Алгоритм:
-        1. Проверяем кэш (_config_cache)
-        2. Если есть → возвращаем (быстро)
-        3. Если нет:
+        1. Повторные вызовы отдаёт lru_cache (без проверок и копий)
+        2. Первый вызов:
            - Проверяем существование config.yaml
            - Парсим YAML
            - Валидируем структуру
-           - Сохраняем в кэш
-           - Возвращаем результат
+           - Замораживаем (MappingProxyType) и возвращаем результат
     
     Returns:
-        Dict[str, Any]: Полная конфигурация системы
+        Mapping[str, Any]: Полная конфигурация системы (read-only — один объект
+        общий для всех модулей и потоков, случайная мутация невозможна)
     
     Raises:
         FileNotFoundError: Если config.yaml не найден
@@ -44,12 +58,6 @@ def load_config() -> Dict[str, Any]:
         >>> print(whisper_model)
         'whisper-large-v3'
     """
-    global _config_cache
-    
-    # Проверяем кэш
-    if _config_cache is not None:
-        return _config_cache
-    
     # Проверяем существование файла
     if not CONFIG_PATH.exists():
         raise FileNotFoundError(
@@ -60,7 +68,7 @@ def load_config() -> Dict[str, Any]:
     # Читаем и парсим YAML
     try:
         with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
+            config = yaml.load(f, Loader=_SafeLoader)
     except yaml.YAMLError as e:
         raise yaml.YAMLError(
             f"Failed to parse config.yaml: {e}\n"
@@ -70,10 +78,7 @@ def load_config() -> Dict[str, Any]:
     # Валидируем структуру
     validate_config(config)
     
-    # Сохраняем в кэш
-    _config_cache = config
-    
-    return config
+    return _freeze(config)
 
 
 def validate_config(config: Dict[str, Any]) -> None:
@@ -10,16 +10,20 @@ import io
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
 sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, Depends
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
 import uvicorn
 import asyncio
-import base64
+import json
+import logging
+import uuid
+from typing import Any, Dict, Mapping, Optional
 from app.config import load_config
 from app.monitoring.logger import setup_logger
 from app.monitoring.metrics import MetricsCollector
 from app.pipeline.orchestrator import Orchestrator
+from app.pipeline.ws_sender import BatchedWebSocketSender
 
 app = FastAPI(
     title="Real-Time Speech Translator",
@@ -30,13 +34,45 @@ app = FastAPI(
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 logger = setup_logger(__name__)
-config = load_config()
 
-# Global metrics collector for API endpoints
-global_metrics = MetricsCollector()
 
-# Global orchestrator reference (updated per WebSocket connection)
-current_orchestrator = None
+# ===========================================
+# APP STATE DEPENDENCIES
+# ===========================================
+# config и глобальный MetricsCollector создаются в startup (app.state), а не
+# при импорте модуля: каждый воркер/тестовый app инициализирует своё состояние
+
+def get_config(request: Request) -> Mapping[str, Any]:
+    """Конфигурация приложения (app.state.config)."""
+    return request.app.state.config
+
+
+def get_metrics_collector(request: Request) -> MetricsCollector:
+    """Глобальный коллектор метрик (app.state.metrics)."""
+    return request.app.state.metrics
+
+# Реестр активных соединений: session_id → Orchestrator (для /metrics и /status).
+# Мутации только из event loop без await между ними — отдельный lock не нужен.
+# Реестр per-process: при uvicorn --workers N каждый воркер видит свои сессии
+active_orchestrators: Dict[str, Orchestrator] = {}
+
+# Входящий протокол WebSocket:
+#   - binary frame: 1 байт тега + payload (AUDIO_FRAME_TAG → сырой PCM int16 16kHz mono)
+#   - text frame: JSON управляющие сообщения (start/stop/set_speed/set_voice/ping)
+# JSON {"type": "audio", "data": base64} оставлен для совместимости со старым клиентом
+AUDIO_FRAME_TAG = 0x01
+
+# pybase64 (опционально, SIMD декодер) для legacy base64 аудио, иначе stdlib
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+# orjson (опционально) для управляющих сообщений, иначе stdlib json
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
 
 # ===========================================
 # PRELOADED MODELS (warm up at startup)
@@ -45,54 +81,75 @@ preloaded_whisper = None
 preloaded_tts = None
 preloaded_llm = None
 
+# Значения изменяемых сессией атрибутов TTS сразу после preload (см. _TTS_SESSION_ATTRS)
+_tts_defaults: Dict[str, object] = {}
+
 
 @app.on_event("startup")
 async def startup_preload_models():
     """Preload all ML models at server startup for instant response."""
-    global preloaded_whisper, preloaded_tts, preloaded_llm
+    global preloaded_whisper, preloaded_tts, preloaded_llm, _tts_defaults
+
+    config = load_config()
+    app.state.config = config
+    # Global metrics collector for API endpoints
+    app.state.metrics = MetricsCollector()
 
     logger.info("=" * 60)
     logger.info("PRELOADING MODELS AT STARTUP...")
     logger.info("=" * 60)
 
+    # Whisper и TTS грузятся параллельно в отдельных потоках (import torch +
+    # чтение весов + перенос на GPU) — старт занимает max(...), а не сумму.
+    # Каждый _load_* сам импортирует только выбранный провайдер.
+
     # 1. Load Whisper (STT)
-    logger.info("[1/3] Loading Whisper model...")
-    try:
-        whisper_config = config["models"]["whisper"]
-        if whisper_config["provider"] == "local":
-            from app.components.local_whisper import LocalWhisperClient
-            preloaded_whisper = LocalWhisperClient()
-        else:
-            from app.components.groq_whisper import GroqWhisperClient
-            preloaded_whisper = GroqWhisperClient()
-        logger.info("[1/3] Whisper loaded OK")
-    except Exception as e:
-        logger.error(f"[1/3] Whisper load FAILED: {e}")
+    def _load_whisper():
+        logger.info("[1/3] Loading Whisper model...")
+        try:
+            whisper_config = config["models"]["whisper"]
+            if whisper_config["provider"] == "local":
+                from app.components.local_whisper import LocalWhisperClient
+                client = LocalWhisperClient()
+            else:
+                from app.components.groq_whisper import GroqWhisperClient
+                client = GroqWhisperClient()
+            logger.info("[1/3] Whisper loaded OK")
+            return client
+        except Exception as e:
+            logger.error(f"[1/3] Whisper load FAILED: {e}")
+            return None
 
     # 2. Load TTS (provider selected via TRANSLATOR_TTS_PROVIDER env var or config)
-    import os
-    tts_provider = os.environ.get("TRANSLATOR_TTS_PROVIDER") or config["models"]["tts"].get("provider", "xtts")
-    logger.info(f"[2/3] Loading TTS: provider={tts_provider}...")
-    try:
-        if tts_provider == "fish_speech":
-            from app.components.fish_speech_engine import FishSpeechTTSPool
-            preloaded_tts = FishSpeechTTSPool()
-            logger.info("[2/3] FishSpeechTTSPool loaded OK")
-        else:
-            # Pre-start Qwen3 daemon in the MAIN process (not inside mp.Process).
-            # Windows spawn: subprocess.PIPE is broken inside mp.Process, so the
-            # daemon must be started here first. Pool workers then just connect via socket.
-            from app.components.qwen3_tts_engine import Qwen3TTSEngine
-            logger.info("[2/3] Pre-starting Qwen3 daemon (main process)...")
-            _engine_prestart = Qwen3TTSEngine()
-            logger.info("[2/3] Qwen3 daemon ready — creating worker pool...")
-            from app.components.tts_worker_pool import TTSWorkerPool
-            preloaded_tts = TTSWorkerPool(num_workers=1)
-            logger.info("[2/3] TTS Worker Pool loaded OK (1 Qwen3 worker ready)")
-    except Exception as e:
-        logger.error(f"[2/3] TTS load FAILED: {e}")
+    def _load_tts():
+        import os
+        tts_provider = os.environ.get("TRANSLATOR_TTS_PROVIDER") or config["models"]["tts"].get("provider", "xtts")
+        logger.info(f"[2/3] Loading TTS: provider={tts_provider}...")
+        try:
+            if tts_provider == "fish_speech":
+                from app.components.fish_speech_engine import FishSpeechTTSPool
+                engine = FishSpeechTTSPool()
+                logger.info("[2/3] FishSpeechTTSPool loaded OK")
+            else:
+                # Pre-start Qwen3 daemon in the MAIN process (not inside mp.Process).
+                # Windows spawn: subprocess.PIPE is broken inside mp.Process, so the
+                # daemon must be started here first. Pool workers then just connect via socket.
+                from app.components.qwen3_tts_engine import Qwen3TTSEngine
+                logger.info("[2/3] Pre-starting Qwen3 daemon (main process)...")
+                _engine_prestart = Qwen3TTSEngine()
+                logger.info("[2/3] Qwen3 daemon ready — creating worker pool...")
+                from app.components.tts_worker_pool import TTSWorkerPool
+                engine = TTSWorkerPool(num_workers=1)
+                logger.info("[2/3] TTS Worker Pool loaded OK (1 Qwen3 worker ready)")
+            return engine
+        except Exception as e:
+            logger.error(f"[2/3] TTS load FAILED: {e}")
+            return None
+
+    load_task = asyncio.gather(asyncio.to_thread(_load_whisper), asyncio.to_thread(_load_tts))
 
-    # 3. Load OpenRouter client (LLM)
+    # 3. Load OpenRouter client (LLM) — лёгкий, но запускает warm-up task,
+    # поэтому создаётся в event loop (пока Whisper/TTS грузятся в потоках)
     logger.info("[3/3] Loading OpenRouter client...")
     try:
         from app.components.openrouter_llm import OpenRouterClient
@@ -101,6 +158,20 @@ async def startup_preload_models():
     except Exception as e:
         logger.error(f"[3/3] OpenRouter load FAILED: {e}")
 
+    preloaded_whisper, preloaded_tts = await load_task
+    _tts_defaults = _snapshot_tts_state()
+
+    # Освобождаем временную память CUDA аллокатора после инициализации
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except ImportError:
+        pass
+
+    # Фоновый замер VRAM (monitoring.metrics.collect_interval) — /metrics не ходит в CUDA
+    app.state.vram_sampler_task = asyncio.create_task(app.state.metrics.run_vram_sampler())
+
     logger.info("=" * 60)
     logger.info("ALL MODELS PRELOADED - SERVER READY!")
     logger.info("=" * 60)
@@ -112,21 +183,46 @@ async def root():
     return FileResponse("static/index.html")
 
 
+# Статические ответы сериализуются один раз (health опрашивается балансировщиком)
+_HEALTH_RESPONSE = Response(content=b'{"status":"healthy"}', media_type="application/json")
+_NO_SESSION_STATUS_RESPONSE = Response(
+    content=b'{"status":"no_active_session","slots":[]}', media_type="application/json"
+)
+
+
 @app.get("/health")
 async def health_check():
     """Health check."""
-    return JSONResponse({"status": "healthy"})
+    return _HEALTH_RESPONSE
 
 
 @app.get("/metrics")
-async def get_metrics():
+async def get_metrics(
+    session: Optional[str] = None,
+    global_metrics: MetricsCollector = Depends(get_metrics_collector),
+):
     """
     Возвращает метрики системы (latency, VRAM, errors).
 
     Используется для мониторинга и dashboard.
+
+    Args:
+        session: session_id соединения; без него — единственная сессия
+            как есть, несколько — {"sessions": {id: metrics}}
     """
-    if current_orchestrator:
-        return JSONResponse(current_orchestrator.get_metrics())
+    if session is not None:
+        orchestrator = active_orchestrators.get(session)
+        if orchestrator is None:
+            return JSONResponse({"status": "unknown_session", "session": session}, status_code=404)
+        return JSONResponse(orchestrator.get_metrics())
+
+    if len(active_orchestrators) == 1:
+        (orchestrator,) = active_orchestrators.values()
+        return JSONResponse(orchestrator.get_metrics())
+    elif active_orchestrators:
+        return JSONResponse({
+            "sessions": {sid: o.get_metrics() for sid, o in active_orchestrators.items()}
+        })
     else:
         # Fallback to global metrics if no active session
         summary = global_metrics.get_summary()
@@ -137,41 +233,71 @@ async def get_metrics():
 
 
 @app.get("/status")
-async def get_status():
+async def get_status(session: Optional[str] = None):
     """
     Возвращает статус очереди батчей (slots).
 
     Показывает текущее состояние 3-слотовой системы.
+
+    Args:
+        session: session_id соединения; без него — единственная сессия
+            как есть, несколько — {"sessions": {id: status}}
     """
-    if current_orchestrator and current_orchestrator.batch_queue:
-        return JSONResponse(current_orchestrator.batch_queue.get_status())
+    if session is not None:
+        orchestrator = active_orchestrators.get(session)
+        if orchestrator is None:
+            return JSONResponse({"status": "unknown_session", "session": session}, status_code=404)
+        if orchestrator.batch_queue:
+            return JSONResponse(orchestrator.batch_queue.get_status())
+        return _NO_SESSION_STATUS_RESPONSE
+
+    statuses = {
+        sid: o.batch_queue.get_status()
+        for sid, o in active_orchestrators.items() if o.batch_queue
+    }
+    if len(statuses) == 1:
+        (status,) = statuses.values()
+        return JSONResponse(status)
+    elif statuses:
+        return JSONResponse({"sessions": statuses})
     else:
-        return JSONResponse({
-            "status": "no_active_session",
-            "slots": []
-        })
+        return _NO_SESSION_STATUS_RESPONSE
+
+
+# Кэш списка голосов: пересканируем voice_samples/ только при смене mtime папки
+_voices_cache = {"mtime": None, "voices": []}
 
 
 @app.get("/voices")
-async def get_voices():
+async def get_voices(config: Mapping[str, Any] = Depends(get_config)):
     """
     Возвращает список доступных голосов из папки voice_samples/.
     """
     import os
     voices_dir = "voice_samples"
-    voices = []
 
-    if os.path.exists(voices_dir):
-        for f in os.listdir(voices_dir):
-            if f.endswith(('.wav', '.mp3')):
-                voices.append({
-                    "filename": f,
-                    "path": f"{voices_dir}/{f}",
-                    "name": os.path.splitext(f)[0].replace('_', ' ').replace('-', ' ').title()
-                })
+    try:
+        mtime = os.stat(voices_dir).st_mtime_ns
+    except OSError:
+        mtime = None
+        _voices_cache["voices"] = []
+
+    if mtime is not None and mtime != _voices_cache["mtime"]:
+        voices = []
+        with os.scandir(voices_dir) as entries:
+            for entry in entries:
+                f = entry.name
+                if f.endswith(('.wav', '.mp3')):
+                    voices.append({
+                        "filename": f,
+                        "path": f"{voices_dir}/{f}",
+                        "name": os.path.splitext(f)[0].replace('_', ' ').replace('-', ' ').title()
+                    })
 
-    # Sort by name
-    voices.sort(key=lambda x: x["name"])
+        # Sort by name
+        voices.sort(key=lambda x: x["name"])
+        _voices_cache["voices"] = voices
+    _voices_cache["mtime"] = mtime
 
     # Mark current voice (from config, not from preloaded pool)
     current_voice = None
@@ -182,90 +308,170 @@ async def get_voices():
         pass
 
     return JSONResponse({
-        "voices": voices,
+        "voices": _voices_cache["voices"],
         "current": current_voice
     })
 
 
+# ===========================================
+# WEBSOCKET CONTROL MESSAGE HANDLERS
+# ===========================================
+# Обработчики JSON сообщений по "type": async (orchestrator, sender, message).
+# Диспетчеризация одним dict lookup вместо if/elif цепочки
+
+async def _handle_start(orchestrator, sender, message):
+    mode = message.get("mode", "contextual")
+    topic = message.get("topic", None)
+    logger.info(f"Processing 'start' message (mode: {mode}, topic: {topic or 'none'})")
+    await orchestrator.start_session(mode=mode, topic=topic)
+
+
+async def _handle_audio(orchestrator, sender, message):
+    audio_data_b64 = message.get("data", "")
+    audio_bytes = base64.b64decode(audio_data_b64)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Processing 'audio' message: %d bytes", len(audio_bytes))
+    await orchestrator.process_audio(audio_bytes)
+
+
+async def _handle_stop(orchestrator, sender, message):
+    logger.info("Processing 'stop' message")
+    await orchestrator.stop_session()
+    await sender.flush()
+
+
+async def _handle_set_speed(orchestrator, sender, message):
+    new_speed = message.get("speed", 1.0)
+    logger.info(f"Set speed request: {new_speed}x")
+    from app.components.tts_worker_pool import TTSWorkerPool
+    if preloaded_tts:
+        if isinstance(preloaded_tts, TTSWorkerPool):
+            preloaded_tts.set_speed(new_speed)
+        else:
+            preloaded_tts.speed = new_speed
+        logger.info(f"Speed changed to {new_speed}x")
+        await sender.send_json({"type": "speed_changed", "speed": new_speed})
+    # Прокидываем browser speed в batch_queue для корректного sleep
+    if orchestrator and orchestrator.batch_queue:
+        orchestrator.batch_queue.browser_speed = new_speed
+
+
+async def _handle_set_voice(orchestrator, sender, message):
+    new_voice = message.get("voice", "")
+    logger.info(f"Set voice request: {new_voice}")
+    # Note: Dynamic voice change not supported with TTSWorkerPool (requires restart)
+    # Only works with legacy single XTTS engine
+    from app.components.tts_worker_pool import TTSWorkerPool
+    if preloaded_tts and new_voice and not isinstance(preloaded_tts, TTSWorkerPool):
+        preloaded_tts.voice_sample = new_voice
+        await sender.send_json({
+            "type": "voice_changed",
+            "voice": new_voice
+        })
+        logger.info(f"Voice changed to {new_voice}")
+    else:
+        logger.warning("Dynamic voice change not supported with TTS Worker Pool (change config.yaml and restart)")
+
+
+async def _handle_audio_done(orchestrator, sender, message):
+    # Клиент доиграл чанк → BatchQueue отправляет следующий (ACK pacing)
+    seq = message.get("seq")
+    # seq приходит от клиента: null / bool / строка не должны рвать сессию
+    if not isinstance(seq, int) or isinstance(seq, bool):
+        logger.warning(f"⚠️ Ignoring audio_done with invalid seq: {seq!r}")
+        return
+    if orchestrator.batch_queue:
+        orchestrator.batch_queue.on_audio_done(seq)
+
+
+async def _handle_ping(orchestrator, sender, message):
+    pass  # Keepalive heartbeat, no response needed
+
+
+MESSAGE_HANDLERS = {
+    "start": _handle_start,
+    "audio": _handle_audio,
+    "stop": _handle_stop,
+    "set_speed": _handle_set_speed,
+    "set_voice": _handle_set_voice,
+    "audio_done": _handle_audio_done,
+    "ping": _handle_ping,
+}
+
+
+# Атрибуты preloaded TTS, которые клиент меняет в рамках сессии (set_speed/set_voice).
+# Снимаются один раз после preload и восстанавливаются, когда отключается
+# последняя сессия — настройки клиентов не переживают их соединения, а
+# пересекающиеся сессии не сбрасывают друг другу скорость/голос
+_TTS_SESSION_ATTRS = ("current_speed", "speed", "voice_sample")
+
+
+def _snapshot_tts_state() -> Dict[str, object]:
+    """Сохраняет изменяемые сессией атрибуты preloaded TTS."""
+    if preloaded_tts is None:
+        return {}
+    return {a: getattr(preloaded_tts, a) for a in _TTS_SESSION_ATTRS if hasattr(preloaded_tts, a)}
+
+
+def _restore_tts_state() -> None:
+    """Возвращает preloaded TTS к значениям после preload, если активных сессий не осталось."""
+    if active_orchestrators:
+        return
+    for attr, value in _tts_defaults.items():
+        if getattr(preloaded_tts, attr, value) != value:
+            setattr(preloaded_tts, attr, value)
+            logger.info(f"TTS {attr} reset to {value} after session end")
+
+
 @app.websocket("/ws/translate")
 async def websocket_endpoint(websocket: WebSocket):
     """
     WebSocket для real-time перевода.
     """
-    global current_orchestrator
+    session_id = uuid.uuid4().hex
 
     try:
         await websocket.accept()
         logger.info("WebSocket connection accepted")
 
+        # Все исходящие сообщения — через один writer с батчингом frame-ов
+        sender = BatchedWebSocketSender(websocket)
+
         # Use preloaded models for instant start
         orchestrator = Orchestrator(
-            websocket,
+            sender,
             whisper_client=preloaded_whisper,
             tts_engine=preloaded_tts,
             llm_client=preloaded_llm
         )
-        current_orchestrator = orchestrator  # Set global reference for /metrics and /status
-        logger.info("Client connected, Orchestrator created with preloaded models")
+        active_orchestrators[session_id] = orchestrator  # Register for /metrics and /status
+        logger.info(f"Client connected (session {session_id}), Orchestrator created with preloaded models")
 
         message_count = 0
         while True:
-            message = await websocket.receive_json()
+            raw = await websocket.receive()
+            if raw["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(raw.get("code", 1000))
             message_count += 1
-            msg_type = message.get("type")
-
-            logger.debug(f"Received message #{message_count}: type={msg_type}")
-
-            if msg_type == "start":
-                mode = message.get("mode", "contextual")
-                topic = message.get("topic", None)
-                logger.info(f"Processing 'start' message (mode: {mode}, topic: {topic or 'none'})")
-                await orchestrator.start_session(mode=mode, topic=topic)
-
-            elif msg_type == "audio":
-                audio_data_b64 = message.get("data", "")
-                audio_bytes = base64.b64decode(audio_data_b64)
-                logger.debug(f"Processing 'audio' message: {len(audio_bytes)} bytes")
-                await orchestrator.process_audio(audio_bytes)
-
-            elif msg_type == "stop":
-                logger.info("Processing 'stop' message")
-                await orchestrator.stop_session()
-
-            elif msg_type == "set_speed":
-                new_speed = message.get("speed", 1.0)
-                logger.info(f"Set speed request: {new_speed}x")
-                from app.components.tts_worker_pool import TTSWorkerPool
-                if preloaded_tts:
-                    if isinstance(preloaded_tts, TTSWorkerPool):
-                        preloaded_tts.set_speed(new_speed)
-                    else:
-                        preloaded_tts.speed = new_speed
-                    logger.info(f"Speed changed to {new_speed}x")
-                    await websocket.send_json({"type": "speed_changed", "speed": new_speed})
-                # Прокидываем browser speed в batch_queue для корректного sleep
-                if orchestrator and orchestrator.batch_queue:
-                    orchestrator.batch_queue.browser_speed = new_speed
-
-            elif msg_type == "set_voice":
-                new_voice = message.get("voice", "")
-                logger.info(f"Set voice request: {new_voice}")
-                # Note: Dynamic voice change not supported with TTSWorkerPool (requires restart)
-                # Only works with legacy single XTTS engine
-                from app.components.tts_worker_pool import TTSWorkerPool
-                if preloaded_tts and new_voice and not isinstance(preloaded_tts, TTSWorkerPool):
-                    preloaded_tts.voice_sample = new_voice
-                    await websocket.send_json({
-                        "type": "voice_changed",
-                        "voice": new_voice
-                    })
-                    logger.info(f"Voice changed to {new_voice}")
+            if message_count % 500 == 0 and logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Received %d messages (session %s)", message_count, session_id)
+
+            # Binary frame: аудио без JSON парсинга и base64 (горячий путь)
+            data = raw.get("bytes")
+            if data is not None:
+                if data and data[0] == AUDIO_FRAME_TAG:
+                    # memoryview: срез без копии, дальше только np.frombuffer
+                    await orchestrator.process_audio(memoryview(data)[1:])
                 else:
-                    logger.warning("Dynamic voice change not supported with TTS Worker Pool (change config.yaml and restart)")
+                    logger.warning(f"Unknown binary frame tag: {data[:1].hex() or 'empty'}")
+                continue
 
-            elif msg_type == "ping":
-                pass  # Keepalive heartbeat, no response needed
+            message = _json_loads(raw.get("text") or "{}")
+            msg_type = message.get("type")
 
+            handler = MESSAGE_HANDLERS.get(msg_type)
+            if handler is not None:
+                await handler(orchestrator, sender, message)
             else:
                 logger.warning(f"Unknown message type: {msg_type}")
 
@@ -278,7 +484,7 @@ async def websocket_endpoint(websocket: WebSocket):
         if orchestrator.session_active:
             logger.info("Stopping active session on disconnect")
             await orchestrator.stop_session()
-        current_orchestrator = None  # Clear global reference
+        await sender.close()
 
     except Exception as e:
         error_type = type(e).__name__
@@ -309,18 +515,37 @@ async def websocket_endpoint(websocket: WebSocket):
         except Exception as stop_err:
             logger.error(f"Error stopping session: {stop_err}")
 
-        current_orchestrator = None
+        try:
+            await sender.close()
+        except Exception:
+            pass
 
         # НЕ пробрасываем ошибку дальше - graceful shutdown
         # raise
 
+    finally:
+        # Снимаем сессию с учёта даже если stop_session() упал
+        active_orchestrators.pop(session_id, None)
+        _restore_tts_state()
+
 
 if __name__ == "__main__":
-    server_config = config["server"]
+    server_config = load_config()["server"]
+
+    # uvloop (libuv) вместо стандартного asyncio loop; на Windows его нет → "auto"
+    try:
+        import uvloop  # noqa: F401
+        loop_impl = "uvloop"
+    except ImportError:
+        loop_impl = "auto"
+
     uvicorn.run(
         app,
         host=server_config["host"],
         port=server_config["port"],
+        loop=loop_impl,
+        http="httptools",
+        ws="websockets",
         log_level="info",
         timeout_keep_alive=86400,  # 24 hours - effectively unlimited (movies can have long silent scenes)
         ws_ping_interval=20,       # Send WebSocket ping every 20s to keep connection alive
@@ -4,12 +4,23 @@
 """
 
 import logging
+import logging.handlers
 import json
-from datetime import datetime
+import functools
+import queue
+import atexit
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any, Dict
 from app.config import load_config
 
+# orjson (опционально) — быстрее stdlib json на маленьких dict
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Кэш логгеров (singleton pattern)
 _loggers: Dict[str, logging.Logger] = {}
 
@@ -28,14 +39,9 @@ def setup_logger(name: str) -> logging.Logger:
         1. Проверяем кэш (_loggers)
         2. Если логгер уже создан → возвращаем его (singleton pattern)
         3. Если нет:
-           - Загружаем конфиг (log_level, log_dir)
+           - Берём общие уровень и QueueHandler (_shared_handlers, один раз на процесс)
            - Создаём logger через logging.getLogger(name)
            - Устанавливаем уровень (INFO/DEBUG/WARNING/ERROR)
-           - Создаём директорию для логов (если не существует)
-           - Создаём file handler → logs/session_YYYY-MM-DD.log
-           - Создаём console handler → stdout
-           - Добавляем JSONFormatter к file handler
-           - Добавляем обычный Formatter к console handler
            - Добавляем handlers к logger
            - Сохраняем в кэш _loggers[name]
            - Возвращаем logger
@@ -54,25 +60,50 @@ def setup_logger(name: str) -> logging.Logger:
     if name in _loggers:
         return _loggers[name]
 
-    # Загружаем конфиг
-    config = load_config()
-    log_level = config["monitoring"]["log_level"]
-    log_dir = Path(config["monitoring"]["log_dir"])
-
-    # Создаём директорию
-    log_dir.mkdir(exist_ok=True)
-
     # CRITICAL: Отключаем логи от сторонних библиотек (только первый раз)
     if not _loggers:
         _silence_third_party_loggers()
 
+    # Уровень и handler создаются один раз на процесс и общие для всех логгеров
+    log_level, queue_handler = _shared_handlers()
+
     # Создаём logger
     logger = logging.getLogger(name)
-    logger.setLevel(getattr(logging, log_level))
+    logger.setLevel(log_level)
+
+    # Добавляем handler (запись в файл/консоль — в потоке QueueListener)
+    logger.addHandler(queue_handler)
 
-    # File handler (JSON для парсинга)
-    log_file = log_dir / f"session_{datetime.now().strftime('%Y-%m-%d')}.log"
-    file_handler = logging.FileHandler(log_file, encoding='utf-8')
+    # Кэшируем
+    _loggers[name] = logger
+
+    return logger
+
+
+@functools.lru_cache(maxsize=1)
+def _shared_handlers():
+    """
+    Создаёт (один раз) уровень логирования и handler, общие для всех логгеров.
+
+    Раньше каждый setup_logger() заново читал конфиг и открывал свой
+    FileHandler на тот же файл — N файловых дескрипторов и N блокировок.
+
+    Логгеры пишут в QueueHandler (O(1) put в очередь), а file/console handlers
+    работают в фоновом потоке QueueListener — блокирующий write() не
+    выполняется в event loop.
+
+    Returns:
+        tuple: (log_level: int, queue_handler)
+    """
+    config = load_config()
+    log_level = getattr(logging, config["monitoring"]["log_level"])
+    log_dir = Path(config["monitoring"]["log_dir"])
+
+    # Создаём директорию
+    log_dir.mkdir(exist_ok=True)
+
+    # File handler (JSON для парсинга), session_YYYY-MM-DD.log с переходом в полночь
+    file_handler = _DailySessionFileHandler(log_dir)
     file_handler.setFormatter(JSONFormatter())
 
     # Console handler (plain text для human reading)
@@ -81,14 +112,42 @@ def setup_logger(name: str) -> logging.Logger:
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     ))
 
-    # Добавляем handlers
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # Фоновый поток записи; при выходе дописываем оставшиеся записи
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler)
+    listener.start()
+    atexit.register(listener.stop)
 
-    # Кэшируем
-    _loggers[name] = logger
+    return log_level, logging.handlers.QueueHandler(log_queue)
 
-    return logger
+
+class _DailySessionFileHandler(logging.FileHandler):
+    """
+    FileHandler, пишущий в log_dir/session_YYYY-MM-DD.log текущего (локального)
+    дня: после полуночи переоткрывает файл с новой датой.
+
+    В отличие от TimedRotatingFileHandler не переименовывает старые файлы —
+    имена остаются как раньше. Проверка — одно сравнение float на запись.
+    """
+
+    def __init__(self, log_dir: Path):
+        self.log_dir = log_dir
+        self._next_rollover = 0.0
+        super().__init__(self._path_for_now(), encoding='utf-8', delay=True)
+
+    def _path_for_now(self) -> str:
+        """Путь файла текущего дня + момент следующей полуночи."""
+        now = datetime.now()
+        next_day = datetime(now.year, now.month, now.day) + timedelta(days=1)
+        self._next_rollover = next_day.timestamp()
+        return str((self.log_dir / f"session_{now.strftime('%Y-%m-%d')}.log").absolute())
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.created >= self._next_rollover:
+            # Новый день → закрываем старый файл, следующий emit откроет новый
+            self.close()
+            self.baseFilename = self._path_for_now()
+        super().emit(record)
 
 
 def _silence_third_party_loggers():
@@ -145,18 +204,32 @@ class JSONFormatter(logging.Formatter):
         >>> handler.setFormatter(formatter)
     """
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Кэш "YYYY-MM-DDTHH:MM:SS" для текущей секунды (strftime — дорогой вызов)
+        self._ts_second = -1
+        self._ts_prefix = ""
+
+    def _timestamp(self, created: float) -> str:
+        """ISO 8601 UTC с микросекундами из record.created (без datetime.utcnow())."""
+        second = int(created)
+        if second != self._ts_second:
+            self._ts_second = second
+            self._ts_prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+        return f"{self._ts_prefix}.{int((created - second) * 1e6):06d}Z"
+
     def format(self, record: logging.LogRecord) -> str:
         """
         Форматирует лог запись в JSON.
         
         Алгоритм:
             1. Создаём словарь log_data с полями:
-               - timestamp: ISO формат UTC
+               - timestamp: ISO формат UTC (из record.created, время создания записи)
                - level: INFO/DEBUG/WARNING/ERROR
                - logger: имя логгера
                - message: текст сообщения
             2. Если есть атрибут 'extra' → добавляем в log_data["extra"]
-            3. Конвертируем в JSON строку через json.dumps()
+            3. Конвертируем в JSON строку через orjson (иначе json.dumps())
             4. Возвращаем строку
         
         Args:
@@ -167,7 +240,7 @@ class JSONFormatter(logging.Formatter):
         """
         # Базовые поля
         log_data = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "timestamp": self._timestamp(record.created),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage()
@@ -178,6 +251,8 @@ class JSONFormatter(logging.Formatter):
             log_data["extra"] = record.extra
         
         # Конвертируем в JSON
+        if orjson is not None:
+            return orjson.dumps(log_data, option=orjson.OPT_SERIALIZE_NUMPY).decode("utf-8")
         return json.dumps(log_data)
 
 
@@ -190,8 +265,8 @@ def log_json(logger: logging.Logger, level: str, message: str, **kwargs) -> None
     поля в JSON лог для последующего анализа.
     
     Алгоритм:
-        1. Получаем метод логгера через getattr(logger, level.lower())
-        2. Вызываем метод с message и extra={'extra': kwargs}
+        1. Уровень ниже порога логгера → сразу выходим (isEnabledFor)
+        2. Вызываем logger.log() с message и extra={'extra': kwargs}
         3. JSONFormatter автоматически добавит kwargs в поле "extra"
     
     Args:
@@ -218,8 +293,10 @@ def log_json(logger: logging.Logger, level: str, message: str, **kwargs) -> None
             }
         }
     """
-    # Получаем метод логирования (info, debug, warning, error)
-    log_method = getattr(logger, level.lower())
-    
+    # Level gate: ниже порога не строим extra dict и LogRecord
+    levelno = logging.getLevelName(level.upper())
+    if not logger.isEnabledFor(levelno):
+        return
+
     # Логируем с extra данными
-    log_method(message, extra={'extra': kwargs})
+    logger.log(levelno, message, extra={'extra': kwargs})
@@ -4,14 +4,55 @@
 """
 
 import time
+import asyncio
 import torch
-import numpy as np
-from collections import defaultdict
-from typing import Dict, List, Any
+from collections import defaultdict, deque
+from typing import Dict, List, Any, Optional
 from app.config import load_config
 from app.monitoring.logger import setup_logger
 
 
+class _RingStats:
+    """
+    Кольцевой буфер (deque maxlen) последних N значений + инкрементальные агрегаты.
+
+    sum / count / max ведутся по ВСЕЙ сессии (как раньше считали по
+    растущему списку), поэтому mean и peak — O(1), а память ограничена N.
+    """
+
+    __slots__ = ("values", "count", "total", "peak")
+
+    def __init__(self, size: int):
+        self.values = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+        self.peak = 0.0
+
+    def append(self, value: float) -> None:
+        """Добавляет значение (старейшее в буфере перезаписывается)."""
+        self.values.append(value)
+        self.count += 1
+        self.total += value
+        if self.count == 1 or value > self.peak:
+            self.peak = value
+
+    def mean(self) -> float:
+        """Среднее за сессию."""
+        return self.total / self.count if self.count else 0.0
+
+    def recent(self) -> List[float]:
+        """Последние min(count, N) значений в порядке записи (копия)."""
+        return list(self.values)
+
+    def __len__(self) -> int:
+        return self.count
+
+
+# Коллектор с запущенным фоновым сэмплером VRAM (run_vram_sampler). VRAM —
+# общая для процесса, поэтому все коллекторы читают значения у него
+_vram_sampler: Optional["MetricsCollector"] = None
+
+
 class MetricsCollector:
     """
     Собирает метрики производительности системы.
@@ -38,12 +79,13 @@ class MetricsCollector:
         Атрибуты:
             config: dict - Конфигурация из config.yaml
             logger: logging.Logger - Логгер для записи метрик
-            session_start: float - Время старта сессии (time.time())
+            session_start: float - Время старта сессии (time.time(), wall clock)
+            session_start_ns: int - Старт сессии по monotonic часам (для длительностей)
             batches_processed: int - Счётчик обработанных батчей
             total_audio_seconds: float - Общее время аудио (сек)
-            latencies: defaultdict(list) - Словарь списков задержек
+            latencies: defaultdict(_RingStats) - Задержки по стадиям (последние history_size)
             errors: defaultdict(int) - Счётчик ошибок
-            vram_usage: list - История использования VRAM
+            vram_usage: _RingStats - История использования VRAM (последние history_size)
         
         Example:
             >>> metrics = MetricsCollector()
@@ -54,12 +96,25 @@ class MetricsCollector:
         self.logger = setup_logger(__name__)
         
         self.session_start = time.time()
+        self.session_start_ns = time.monotonic_ns()
         self.batches_processed = 0
         self.total_audio_seconds = 0.0
         
-        self.latencies = defaultdict(list)
+        # Фиксированный размер истории: память не растёт в длинных сессиях,
+        # get_summary() — O(1) по running sum/max
+        metrics_cfg = self.config["monitoring"]["metrics"]
+        history_size = metrics_cfg.get("history_size", 10000)
+        self.latencies = defaultdict(lambda: _RingStats(history_size))
         self.errors = defaultdict(int)
-        self.vram_usage = []
+        self.vram_usage = _RingStats(history_size)
+
+        # Пороги читаем один раз (record_latency вызывается на каждый чанк)
+        self.latency_alert_threshold = metrics_cfg["latency_alert_threshold"]
+        self.vram_alert_threshold = metrics_cfg["vram_alert_threshold"]
+
+        # Последний замер VRAM (MB) и период фонового сэмплера
+        self.collect_interval = metrics_cfg.get("collect_interval", 5.0)
+        self.vram_latest = 0.0
     
     def record_latency(self, stage: str, duration: float) -> None:
         """
@@ -72,8 +127,8 @@ class MetricsCollector:
             - "e2e": End-to-End (full pipeline)
         
         Алгоритм:
-            1. Добавляем duration в список self.latencies[stage]
-            2. Получаем threshold из конфига
+            1. Добавляем duration в кольцевой буфер self.latencies[stage]
+            2. Берём threshold (прочитан из конфига в __init__)
             3. Если duration > threshold → логируем warning
             4. Это помогает отслеживать аномально медленные операции
         
@@ -87,17 +142,43 @@ class MetricsCollector:
             >>> metrics.record_latency("translation", 1.5)
             >>> metrics.record_latency("tts", 2.1)
         """
-        # Добавляем в список
+        # Добавляем в кольцевой буфер
         self.latencies[stage].append(duration)
         
         # Проверяем threshold
-        threshold = self.config["monitoring"]["metrics"]["latency_alert_threshold"]
+        threshold = self.latency_alert_threshold
         if duration > threshold:
             self.logger.warning(
                 f"High latency in {stage}: {duration:.2f}s "
                 f"(threshold: {threshold}s)"
             )
     
+    def record_batch_latencies(self, **durations: float) -> None:
+        """
+        Записывает задержки всех стадий одного батча за один вызов.
+
+        То же, что record_latency() на каждую стадию, но превышения порога
+        собираются в одно warning сообщение (одна запись лога на батч).
+
+        Args:
+            **durations: stage → время выполнения в секундах
+
+        Example:
+            >>> metrics.record_batch_latencies(stt=0.3, translation=1.5, tts=2.1, e2e=3.9)
+        """
+        threshold = self.latency_alert_threshold
+        slow = []
+        for stage, duration in durations.items():
+            self.latencies[stage].append(duration)
+            if duration > threshold:
+                slow.append(f"{stage}={duration:.2f}s")
+
+        if slow:
+            self.logger.warning(
+                f"High latency in {', '.join(slow)} "
+                f"(threshold: {threshold}s)"
+            )
+
     def record_error(self, stage: str, error_type: str) -> None:
         """
         Записывает ошибку для определённой стадии.
@@ -124,9 +205,9 @@ class MetricsCollector:
             f"(total errors in {stage}: {self.errors[stage]})"
         )
     
-    def get_vram_usage(self) -> float:
+    def sample_vram(self) -> float:
         """
-        Получает текущее использование VRAM (GPU memory).
+        Замеряет текущее использование VRAM (GPU memory).
         
         Алгоритм:
             1. Проверяем, доступна ли CUDA через torch.cuda.is_available()
@@ -142,10 +223,9 @@ class MetricsCollector:
         Returns:
             float: VRAM в мегабайтах (MB)
         
-        Example:
-            >>> vram = metrics.get_vram_usage()
-            >>> print(f"VRAM: {vram:.1f} MB")
-            VRAM: 3245.2 MB
+        Note:
+            Обращается к CUDA контексту — вызывать из фонового сэмплера
+            (run_vram_sampler), а не из HTTP обработчиков.
         """
         # Проверяем CUDA
         if not torch.cuda.is_available():
@@ -154,9 +234,10 @@ class MetricsCollector:
         # Получаем VRAM в MB
         vram_mb = torch.cuda.memory_allocated() / (1024 ** 2)
         self.vram_usage.append(vram_mb)
+        self.vram_latest = vram_mb
         
         # Проверяем threshold
-        threshold = self.config["monitoring"]["metrics"]["vram_alert_threshold"]
+        threshold = self.vram_alert_threshold
         if vram_mb > threshold:
             self.logger.warning(
                 f"High VRAM usage: {vram_mb:.1f} MB "
@@ -164,17 +245,57 @@ class MetricsCollector:
             )
         
         return vram_mb
+
+    async def run_vram_sampler(self) -> None:
+        """
+        Фоновый цикл: замер VRAM каждые collect_interval секунд в отдельном
+        потоке (CUDA вызов не блокирует event loop). Запускается один раз
+        на процесс (FastAPI startup), остальные коллекторы читают его данные.
+        """
+        global _vram_sampler
+        _vram_sampler = self
+        try:
+            while True:
+                await asyncio.to_thread(self.sample_vram)
+                await asyncio.sleep(self.collect_interval)
+        finally:
+            if _vram_sampler is self:
+                _vram_sampler = None
+
+    def get_vram_usage(self) -> float:
+        """
+        Возвращает последний замер VRAM без обращения к CUDA.
+
+        Returns:
+            float: VRAM в мегабайтах (MB). Если фоновый сэмплер не запущен
+            (скрипты/тесты) — замеряет синхронно через sample_vram().
+        
+        Example:
+            >>> vram = metrics.get_vram_usage()
+            >>> print(f"VRAM: {vram:.1f} MB")
+            VRAM: 3245.2 MB
+        """
+        if _vram_sampler is None:
+            return self.sample_vram()
+        return _vram_sampler.vram_latest
     
+    def session_uptime(self) -> float:
+        """
+        Длительность сессии в секундах по monotonic часам (не прыгает при
+        переводе системного времени / NTP).
+        """
+        return (time.monotonic_ns() - self.session_start_ns) / 1e9
+
     def get_summary(self) -> Dict[str, Any]:
         """
         Возвращает сводку всех метрик за сессию.
         
         Алгоритм:
-            1. Вычисляем session_duration = time.time() - session_start
-            2. Для каждой стадии считаем среднюю latency через np.mean()
-            3. Получаем текущий VRAM через get_vram_usage()
-            4. Вычисляем средний VRAM: np.mean(self.vram_usage)
-            5. Вычисляем пиковый VRAM: max(self.vram_usage)
+            1. Вычисляем session_duration через session_uptime() (monotonic)
+            2. Для каждой стадии берём среднюю latency (running sum / count, O(1))
+            3. Получаем текущий VRAM через get_vram_usage() (последний замер)
+            4. Средний VRAM: running sum / count (история фонового сэмплера)
+            5. Пиковый VRAM: running max
             6. Возвращаем всё в dict
         
         Returns:
@@ -199,16 +320,17 @@ class MetricsCollector:
                     "vram_peak_mb": 3890.1
                 }
         """
-        session_duration = time.time() - self.session_start
+        session_duration = self.session_uptime()
         
         latency_avg = {
-            stage: np.mean(times) if times else 0.0
-            for stage, times in self.latencies.items()
+            stage: stats.mean()
+            for stage, stats in self.latencies.items()
         }
         
         vram_current = self.get_vram_usage()
-        vram_avg = np.mean(self.vram_usage) if self.vram_usage else 0.0
-        vram_peak = max(self.vram_usage) if self.vram_usage else 0.0
+        vram_stats = (_vram_sampler or self).vram_usage
+        vram_avg = vram_stats.mean()
+        vram_peak = vram_stats.peak
         
         return {
             "session_duration": session_duration,
@@ -6,9 +6,9 @@
 import asyncio
 import re
 import time
-import base64
+from collections import deque
 import numpy as np
-from typing import Dict, Any, Optional
+from typing import Any, Awaitable, Callable, Dict, Optional
 from app.config import load_config
 from app.monitoring.logger import setup_logger, log_json
 from app.monitoring.metrics import MetricsCollector
@@ -18,9 +18,96 @@ from app.components.local_whisper import LocalWhisperClient
 from app.components.openrouter_llm import OpenRouterClient
 from app.components.xtts_engine import XTTSEngine
 from app.components.tts_worker_pool import TTSWorkerPool, _apply_atempo
+from app.components.audio_utils import wav_duration, wav_pcm16, concat_wav
 from app.pipeline.smart_buffer import SmartBuffer
 
 
+def _strip_markdown(text: str) -> str:
+    """Убирает markdown артефакты из ответа LLM (**bold**, *, `)."""
+    text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)
+    return text.replace('*', '').replace('`', '').strip()
+
+
+class _Stage:
+    """
+    Стадия пайплайна: num_workers долгоживущих задач разбирают свою FIFO
+    очередь работ. run() ставит работу в очередь и ждёт её результат.
+
+    Заменяет asyncio.Semaphore вокруг стадии: переход между стадиями — один
+    put_nowait + future, порядок — FIFO очереди, параллелизм — число worker-ов.
+    """
+
+    def __init__(self, name: str, num_workers: int, logger):
+        self.name = name
+        self.num_workers = num_workers
+        self.logger = logger
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks = []
+
+    def ensure_started(self) -> None:
+        """Запускает (или перезапускает упавшие) worker задачи стадии."""
+        self._tasks = [t for t in self._tasks if not t.done()]
+        while len(self._tasks) < self.num_workers:
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def run(self, job: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполняет job() на worker-е стадии.
+
+        Args:
+            job: Фабрика корутины (вызывается worker-ом, не здесь)
+
+        Returns:
+            Результат job() (исключение job() пробрасывается сюда)
+        """
+        self.ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((job, future))
+        return await future
+
+    async def _worker(self) -> None:
+        while True:
+            job, future = await self._queue.get()
+            if future.cancelled():
+                continue  # батч отменён, пока работа ждала в очереди
+            try:
+                result = await job()
+            except asyncio.CancelledError:
+                # Future должен разрешиться всегда — иначе run() ждёт вечно и
+                # батч держит слот pipeline_semaphore
+                if not future.done():
+                    future.cancel()
+                # Отменили сам worker (stop()) — выходим; CancelledError изнутри
+                # job() (task.cancelling() == 0) — worker продолжает работу
+                cancelling = getattr(asyncio.current_task(), "cancelling", None)
+                if cancelling is None or cancelling():
+                    raise
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            except BaseException as e:
+                if not future.done():
+                    future.set_exception(e)
+                raise
+            else:
+                if not future.done():
+                    future.set_result(result)
+
+    async def stop(self) -> None:
+        """Останавливает worker-ов; ещё не начатые работы отменяются."""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            future.cancel()
+
+
 class BatchQueue:
     """
     3-слотовая очередь батчей для non-stop обработки.
@@ -33,6 +120,14 @@ class BatchQueue:
     Принцип:
         Пока Slot 1 играет, Slot 3 обрабатывает новый батч.
         Когда Slot 1 освободился → Slot 2 → Slot 1 (playing).
+
+    Инвариант: все методы работают в ОДНОМ event loop, поэтому счётчики
+    (chunk_counter, processing_count) меняются без блокировок — между
+    чтением и записью нет await.
+
+    Event loop: на Linux/macOS сервер запускается на uvloop (см. uvicorn.run
+    в app/main.py; uvicorn CLI с --loop auto выбирает его сам, если пакет
+    установлен). Код здесь от реализации loop не зависит.
     """
     
     def __init__(self, websocket, whisper_client=None, tts_engine=None, llm_client=None, metrics_collector=None, topic=None):
@@ -47,7 +142,9 @@ class BatchQueue:
             metrics_collector: Shared metrics collector (optional)
             topic: Optional topic/context for translation (optional)
         """
-        self.config = load_config()["pipeline"]
+        # Один раз на конструктор (load_config кэширован — это просто ссылка)
+        config = load_config()
+        self.config = config["pipeline"]
         self.logger = setup_logger(__name__)
         self.metrics = metrics_collector if metrics_collector else MetricsCollector()
         self.websocket = websocket
@@ -57,7 +154,10 @@ class BatchQueue:
             self.whisper_client = whisper_client
             self.logger.info("Using preloaded Whisper client")
         else:
-            whisper_config = load_config()["models"]["whisper"]
+            # Нормальный путь — preload в main.startup_event; здесь только
+            # fallback (модель/клиент создаются на каждую сессию)
+            self.logger.warning("No preloaded Whisper client, creating a new one for this session")
+            whisper_config = config["models"]["whisper"]
             if whisper_config["provider"] == "local":
                 self.whisper_client = LocalWhisperClient()
             else:
@@ -67,6 +167,7 @@ class BatchQueue:
             self.openrouter_client = llm_client
             self.logger.info("Using preloaded LLM client")
         else:
+            self.logger.warning("No preloaded LLM client, creating a new one (shares the process-wide connection pool)")
             self.openrouter_client = OpenRouterClient()
 
         # TTS Worker Pool: 2 workers на 2 GPU для параллельной обработки
@@ -99,7 +200,10 @@ class BatchQueue:
 
         # НОВАЯ АРХИТЕКТУРА: Очередь готовых батчей (FIFO)
         self.max_ready_queue_size = self.config.get("max_ready_queue_size", 10)  # Max chunks in queue
-        self.ready_queue = asyncio.Queue()  # Очередь готовых батчей
+        # Очередь готовых батчей: один потребитель (_playback_loop), поэтому
+        # deque + Event вместо asyncio.Queue (без getters/putters и task_done)
+        self._ready: deque = deque()
+        self._ready_event = asyncio.Event()
         self.playback_task = None  # Фоновая задача воспроизведения
         self.heartbeat_task = None  # Keepalive task (prevents browser from closing idle WS)
         self.is_running = False
@@ -114,7 +218,7 @@ class BatchQueue:
         self.playback_started = False  # Флаг первого запуска
 
         # ADAPTIVE SPEED: Auto-adjust TTS speed based on queue size
-        tts_config = load_config()["models"]["tts"]
+        tts_config = config["models"]["tts"]
         self.adaptive_speed_config = tts_config.get("adaptive_speed", {})
         self.adaptive_speed_enabled = self.adaptive_speed_config.get("enabled", False)
         if self.adaptive_speed_enabled:
@@ -123,9 +227,33 @@ class BatchQueue:
                 f"{self.adaptive_speed_config['max_speed']}x based on queue size"
             )
 
+        # SLO таймауты внешних вызовов (pipeline.timeouts): зависший STT/LLM/TTS
+        # освобождает worker пула, а не держит FIFO очередь бесконечно
+        timeouts = self.config.get("timeouts", {})
+        self.stt_timeout = timeouts.get("whisper_api", 30.0)
+        self.translation_timeout = timeouts.get("translation_api", 10.0)
+        self.tts_timeout = timeouts.get("tts_synthesis", 15.0)
+
+        # STREAMING TRANSLATION (smart mode): TTS каждого предложения стартует,
+        # как только LLM его дописал, а не после всего перевода
+        self.stream_translation = config["models"]["translation"].get("streaming", False)
+
         # Browser playback speed (set via UI slider, used in sleep calculation)
         self.browser_speed = 1.0
 
+        # Порядковый номер binary audio frame (audio_output.seq в заголовке)
+        self._audio_seq = 0
+
+        # CLIENT ACK PACING: клиент шлёт {"type": "audio_done", "seq": N} когда
+        # чанк доиграл. После первого ACK темп задаёт клиент (нет дрейфа между
+        # sleep сервера и реальным воспроизведением); до этого — sleep(duration)
+        self._client_acks = False
+        self._acked_seq = -1
+        self._ack_event = asyncio.Event()
+        # Длительность (с учётом скорости) предыдущего отправленного чанка —
+        # таймаут ожидания его ACK
+        self._prev_play_sleep = 0.0
+
         # EMA adaptive speed state
         self._adaptive_speed = 1.0        # Current smooth speed (1.0 = normal)
         self._chunk_arrival_times = []     # Timestamps of last N chunk arrivals
@@ -134,22 +262,27 @@ class BatchQueue:
 
         # Счетчики для мониторинга
         self.processing_count = 0  # Сколько батчей сейчас обрабатывается
-        self.processing_lock = asyncio.Lock()  # Для атомарности счетчика
         self.chunk_counter = 0  # Глобальный счётчик чанков для отслеживания (CHUNK #1, #2, #3...)
 
-        # PIPELINE CONCURRENCY CONTROL
-        # WHISPER: semaphore=1 (sequential) - preserve chunk order
-        # TRANSLATION: semaphore=2-3 (parallel) - API, no CUDA, can handle multiple requests
-        # TTS: NO SEMAPHORE! Worker pool handles parallelism via queue + separate processes
-        self.whisper_semaphore = asyncio.Semaphore(1)  # Sequential (preserve order)
-        self.translation_semaphore = asyncio.Semaphore(3)  # Parallel (API) - increased to 3
-        # self.tts_semaphore removed - worker pool handles this now!
+        # PIPELINE CONCURRENCY CONTROL: у стадий свои worker-ы + FIFO очереди
+        # WHISPER: 1 worker (sequential) - preserve chunk order
+        # TRANSLATION: 3 workers (parallel) - API, no CUDA, can handle multiple requests
+        # TTS: без стадии! Worker pool handles parallelism via queue + separate processes
+        self.stt_stage = _Stage("stt", 1, self.logger)
+        self.translation_stage = _Stage("translation", 3, self.logger)
 
         # GLOBAL PIPELINE LIMIT: Максимум N батчей в системе одновременно
         # (Processing + Ready + Playing)
         self.max_concurrent_batches = self.config.get("batch_queue_size", 3)
         self.pipeline_semaphore = asyncio.Semaphore(self.max_concurrent_batches)
 
+        # WORKER POOL: K долгоживущих задач разбирают очередь работ вместо
+        # create_task на каждый чанк. K ограничивает число батчей одновременно
+        # в STT→LLM→TTS (остальные ждут в очереди в FIFO порядке)
+        self.num_batch_workers = self.config.get("batch_workers", 4)
+        self._work_queue: asyncio.Queue = asyncio.Queue()
+        self._worker_tasks = []
+
         self.logger.info(
             f"BatchQueue initialized (pipeline: max {self.max_concurrent_batches} batches, "
             f"NON-STOP: buffer {self.min_ready_chunks_before_start} chunks before playback, "
@@ -174,7 +307,7 @@ class BatchQueue:
 
         # Check if we need to wait (все слоты заняты)
         if self.pipeline_semaphore._value == 0:
-            self.logger.warning(f"⚠️ Pipeline FULL ({self.max_concurrent_batches}/{self.max_concurrent_batches} slots) - waiting for free slot... (processing: {self.processing_count}, ready: {self.ready_queue.qsize()})")
+            self.logger.warning(f"⚠️ Pipeline FULL ({self.max_concurrent_batches}/{self.max_concurrent_batches} slots) - waiting for free slot... (processing: {self.processing_count}, ready: {len(self._ready)})")
 
         await self.pipeline_semaphore.acquire()
 
@@ -182,20 +315,20 @@ class BatchQueue:
         self._chunk_arrival_times.append(time.time())
 
         # Присваиваем уникальный ID чанку
-        async with self.processing_lock:
-            self.chunk_counter += 1
-            chunk_id = self.chunk_counter
-            self.processing_count += 1
+        self.chunk_counter += 1
+        chunk_id = self.chunk_counter
+        self.processing_count += 1
 
         # Запускаем обработку В ФОНЕ (асинхронно, БЕЗ ОЖИДАНИЯ)
         current_time = time.strftime('%H:%M:%S')
         self.logger.info(
             f"\n╔═══ CHUNK #{chunk_id} QUEUED [{current_time}] ═══╗\n"
             f"║ Processing: {self.processing_count}\n"
-            f"║ Ready queue: {self.ready_queue.qsize()}\n"
+            f"║ Ready queue: {len(self._ready)}\n"
             f"╚{'═' * 40}╝"
         )
-        asyncio.create_task(self._process_batch_async(audio_array, chunk_id))
+        self._ensure_workers()
+        self._work_queue.put_nowait((self._process_batch_async, audio_array, chunk_id))
 
     async def add_text_batch(self, text: str) -> None:
         """
@@ -208,31 +341,56 @@ class BatchQueue:
             text: Confirmed English text from LocalAgreement-2 processor
         """
         if not text or len(text.strip()) < 3:
-            self.logger.debug(f"Skipping empty/short text batch: '{text}'")
+            self.logger.debug("Skipping empty/short text batch: '%s'", text)
             return
 
         if self.pipeline_semaphore._value == 0:
             self.logger.warning(
                 f"⚠️ Pipeline FULL - waiting for free slot... "
-                f"(processing: {self.processing_count}, ready: {self.ready_queue.qsize()})"
+                f"(processing: {self.processing_count}, ready: {len(self._ready)})"
             )
 
         await self.pipeline_semaphore.acquire()
 
-        async with self.processing_lock:
-            self.chunk_counter += 1
-            chunk_id = self.chunk_counter
-            self.processing_count += 1
+        self.chunk_counter += 1
+        chunk_id = self.chunk_counter
+        self.processing_count += 1
 
         current_time = time.strftime('%H:%M:%S')
         self.logger.info(
             f"\n╔═══ CHUNK #{chunk_id} TEXT QUEUED [{current_time}] ═══╗\n"
             f"║ Text: {text[:80]}\n"
             f"║ Processing: {self.processing_count}\n"
-            f"║ Ready queue: {self.ready_queue.qsize()}\n"
+            f"║ Ready queue: {len(self._ready)}\n"
             f"╚{'═' * 40}╝"
         )
-        asyncio.create_task(self._process_text_batch_async(text, chunk_id))
+        self._ensure_workers()
+        self._work_queue.put_nowait((self._process_text_batch_async, text, chunk_id))
+
+    def _ensure_workers(self) -> None:
+        """Запускает (или перезапускает упавшие) worker задачи пула обработки."""
+        self._worker_tasks = [t for t in self._worker_tasks if not t.done()]
+        while len(self._worker_tasks) < self.num_batch_workers:
+            self._worker_tasks.append(asyncio.create_task(self._batch_worker()))
+        self.stt_stage.ensure_started()
+        self.translation_stage.ensure_started()
+
+    async def _batch_worker(self) -> None:
+        """
+        Worker пула обработки: берёт (handler, payload, chunk_id) из очереди
+        работ и выполняет handler (_process_batch_async / _process_text_batch_async).
+
+        Handler сам кладёт результат (или None-сентинел) в sequential буфер
+        и освобождает слоты при ошибках — worker только разбирает очередь.
+        """
+        while True:
+            handler, payload, chunk_id = await self._work_queue.get()
+            try:
+                await handler(payload, chunk_id)
+            except Exception as e:
+                self.logger.error(f"Batch worker: unhandled error in chunk #{chunk_id}: {e}")
+            finally:
+                self._work_queue.task_done()
 
     async def _process_text_batch_async(self, text: str, chunk_id: int) -> None:
         """
@@ -262,8 +420,7 @@ class BatchQueue:
             await self._advance_sequential_queue()
 
         finally:
-            async with self.processing_lock:
-                self.processing_count -= 1
+            self.processing_count -= 1
 
     async def process_text_batch(self, text: str, chunk_id: int) -> Dict[str, Any]:
         """
@@ -279,6 +436,8 @@ class BatchQueue:
         Returns:
             Dict с результатами или None если пропущено
         """
+        # Задержки стадий копим локально и пишем в метрики одним вызовом
+        latencies: Dict[str, float] = {}
         try:
             pipeline_start = time.time()
 
@@ -293,19 +452,48 @@ class BatchQueue:
                 return None
 
             # STEP 1: Translation (OpenRouter + context + topic)
-            async with self.translation_semaphore:
+            # tts_tasks заполняет стадия перевода (стриминг), ждём их после неё
+            tts_tasks = []
+
+            async def _translation_step():
                 start = time.time()
                 self.logger.info(f"🌐 Chunk #{chunk_id} → TRANSLATION (smart mode)...")
                 context = await self.context_buffer.get_context()
-                translation = await self.openrouter_client.translate(
-                    stt_text, context, topic=self.topic
-                )
+                if self.stream_translation:
+                    # Предложение готово → сразу в TTS, LLM дописывает остальные
+                    sentences = []
+                    try:
+                        async with asyncio.timeout(self.translation_timeout):
+                            async for sentence in self.openrouter_client.translate_stream(
+                                stt_text, context, topic=self.topic
+                            ):
+                                sentence = _strip_markdown(sentence)
+                                if not sentence:
+                                    continue
+                                if not sentences:
+                                    self.logger.info(
+                                        f"   ⏩ First sentence after {time.time() - start:.2f}s → TTS"
+                                    )
+                                sentences.append(sentence)
+                                tts_tasks.append(asyncio.create_task(self._synthesize(sentence)))
+                    except TimeoutError:
+                        for task in tts_tasks:
+                            task.cancel()
+                        self.metrics.record_error("translation_timeout", f"no result after {self.translation_timeout}s")
+                        raise TimeoutError(f"translation timed out after {self.translation_timeout}s") from None
+                    except BaseException:
+                        for task in tts_tasks:
+                            task.cancel()
+                        raise
+                    translation = " ".join(sentences)
+                else:
+                    translation = await self._call_with_timeout(
+                        "translation",
+                        self.openrouter_client.translate(stt_text, context, topic=self.topic),
+                        self.translation_timeout
+                    )
+                    translation = _strip_markdown(translation)
                 translation_duration = time.time() - start
-                self.metrics.record_latency("translation", translation_duration)
-
-                # Strip markdown artifacts
-                translation = re.sub(r'\*\*(.+?)\*\*', r'\1', translation)
-                translation = translation.replace('*', '').replace('`', '').strip()
 
                 self.logger.info(
                     f"   ✅ TRANSLATION done: {translation_duration:.2f}s\n"
@@ -318,30 +506,42 @@ class BatchQueue:
                 )
 
                 await self.context_buffer.add_pair(stt_text, translation)
+                return translation, translation_duration
+
+            translation, translation_duration = await self.translation_stage.run(_translation_step)
+            latencies["translation"] = translation_duration
 
             # STEP 2: TTS (Worker Pool)
+            # При стриминге часть TTS уже выполнена параллельно с LLM —
+            # tts_duration это только оставшееся после перевода ожидание
             start = time.time()
             self.logger.info(f"🔊 Chunk #{chunk_id} → TTS (smart mode)...")
 
-            if self.tts_worker_pool:
-                audio_bytes = await self.tts_worker_pool.synthesize(translation)
+            if tts_tasks:
+                audio_parts = await self._call_with_timeout(
+                    "tts", asyncio.gather(*tts_tasks), self.tts_timeout, shield=True
+                )
+                if not all(audio_parts):
+                    raise RuntimeError(f"TTS returned empty/None for a sentence of chunk #{chunk_id}")
+                audio_bytes = concat_wav(audio_parts)
+            elif translation:
+                audio_bytes = await self._call_with_timeout(
+                    "tts", self._synthesize(translation), self.tts_timeout, shield=True
+                )
             else:
-                audio_bytes = await self.xtts_engine.synthesize(translation)
+                audio_bytes = None
 
             tts_duration = time.time() - start
-            self.metrics.record_latency("tts", tts_duration)
+            latencies["tts"] = tts_duration
 
             if not audio_bytes:
                 raise RuntimeError(f"TTS returned empty/None for chunk #{chunk_id}")
 
-            # Calculate audio duration from WAV header
-            tts_config = load_config()["models"]["tts"]
-            tts_sample_rate = tts_config.get("output_sample_rate", 24000)
-            audio_data_size = len(audio_bytes) - 44
-            audio_duration = audio_data_size / (tts_sample_rate * 2)
+            # Calculate audio duration from WAV header (fmt/data chunks)
+            audio_duration = wav_duration(audio_bytes)
 
             e2e_duration = time.time() - pipeline_start
-            self.metrics.record_latency("e2e", e2e_duration)
+            latencies["e2e"] = e2e_duration
 
             self.logger.info(
                 f"\n╔═══ CHUNK #{chunk_id} SMART PIPELINE COMPLETE ═══╗\n"
@@ -349,7 +549,7 @@ class BatchQueue:
                 f"║ TRANSLATION: {translation_duration:.2f}s\n"
                 f"║ TTS:         {tts_duration:.2f}s\n"
                 f"║ E2E:         {e2e_duration:.2f}s\n"
-                f"║ Ready queue: {self.ready_queue.qsize()} chunks\n"
+                f"║ Ready queue: {len(self._ready)} chunks\n"
                 f"╚{'═' * 40}╝"
             )
 
@@ -367,6 +567,41 @@ class BatchQueue:
             self.logger.error(f"Text batch processing failed: {e}")
             raise
 
+        finally:
+            if latencies:
+                self.metrics.record_batch_latencies(**latencies)
+
+    async def _call_with_timeout(self, stage: str, awaitable, timeout: float, shield: bool = False):
+        """
+        Ждёт внешний вызов не дольше timeout секунд.
+
+        Args:
+            stage: Стадия для метрик ("stt", "translation", "tts")
+            awaitable: Корутина / future внешнего вызова
+            timeout: Лимит в секундах (pipeline.timeouts)
+            shield: True — при таймауте сам вызов НЕ отменяется (GPU модель /
+                TTS worker не прерываются посреди работы, результат отбрасывается)
+
+        Raises:
+            TimeoutError: Если результата нет за timeout (записывается {stage}_timeout)
+        """
+        task = asyncio.ensure_future(awaitable)
+        if shield:
+            # Брошенный после таймаута вызов может упасть позже — забираем
+            # исключение, чтобы не было "exception was never retrieved"
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        try:
+            return await asyncio.wait_for(asyncio.shield(task) if shield else task, timeout)
+        except TimeoutError:
+            self.metrics.record_error(f"{stage}_timeout", f"no result after {timeout}s")
+            raise TimeoutError(f"{stage} timed out after {timeout}s") from None
+
+    async def _synthesize(self, text: str) -> bytes:
+        """TTS через worker pool (или direct engine) — WAV bytes."""
+        if self.tts_worker_pool:
+            return await self.tts_worker_pool.synthesize(text)
+        return await self.xtts_engine.synthesize(text)
+
     def _calculate_adaptive_speed(self, queue_size: int) -> float:
         """
         Вычисляет adaptive TTS speed на основе размера очереди.
@@ -426,22 +661,19 @@ class BatchQueue:
             next_batch = self.completed_chunks_buffer.pop(self.next_playback_chunk_id)
 
             # QUEUE OVERFLOW PROTECTION
-            current_queue_size = self.ready_queue.qsize()
+            current_queue_size = len(self._ready)
             if current_queue_size >= self.max_ready_queue_size:
-                try:
-                    old_batch = self.ready_queue.get_nowait()
-                    self.ready_queue.task_done()
-                    if old_batch.get('_pipeline_semaphore_acquired'):
-                        self.pipeline_semaphore.release()
-                    self.logger.warning(
-                        f"⚠️ Queue OVERFLOW ({current_queue_size}/{self.max_ready_queue_size}) - "
-                        f"SKIPPED old chunk (duration: {old_batch.get('duration', 0):.1f}s)"
-                    )
-                except asyncio.QueueEmpty:
-                    pass
+                old_batch = self._ready.popleft()
+                if old_batch.get('_pipeline_semaphore_acquired'):
+                    self.pipeline_semaphore.release()
+                self.logger.warning(
+                    f"⚠️ Queue OVERFLOW ({current_queue_size}/{self.max_ready_queue_size}) - "
+                    f"SKIPPED old chunk (duration: {old_batch.get('duration', 0):.1f}s)"
+                )
 
-            await self.ready_queue.put(next_batch)
-            self.logger.debug(f"Chunk #{self.next_playback_chunk_id} added to ready_queue (sequential order)")
+            self._ready.append(next_batch)
+            self._ready_event.set()
+            self.logger.debug("Chunk #%d added to ready_queue (sequential order)", self.next_playback_chunk_id)
             self.next_playback_chunk_id += 1
 
     async def _process_batch_async(self, audio_array: np.ndarray, chunk_id: int) -> None:
@@ -495,8 +727,7 @@ class BatchQueue:
             await self._advance_sequential_queue()
 
         finally:
-            async with self.processing_lock:
-                self.processing_count -= 1
+            self.processing_count -= 1
 
     async def start_playback_loop(self) -> None:
         """
@@ -512,6 +743,7 @@ class BatchQueue:
             return
 
         self.is_running = True
+        self._ensure_workers()
         self.playback_task = asyncio.create_task(self._playback_loop())
         self.heartbeat_task = asyncio.create_task(self._heartbeat_loop())
         self.logger.info("Playback loop started (heartbeat every 5s)")
@@ -533,29 +765,34 @@ class BatchQueue:
             try:
                 # КРИТИЧНО: Первый запуск - ждём накопления буфера!
                 if not self.playback_started:
-                    # Ждём пока накопится минимум чанков
-                    while self.ready_queue.qsize() < self.min_ready_chunks_before_start:
-                        current_ready = self.ready_queue.qsize()
+                    # Ждём пока накопится минимум чанков: просыпаемся по _ready_event
+                    # на каждый готовый чанк (без опроса раз в 0.5s)
+                    if len(self._ready) < self.min_ready_chunks_before_start:
                         self.logger.info(
                             f"🔄 Buffering before playback start: "
-                            f"{current_ready}/{self.min_ready_chunks_before_start} chunks ready, "
+                            f"{len(self._ready)}/{self.min_ready_chunks_before_start} chunks ready, "
                             f"{self.processing_count} processing..."
                         )
+                    while len(self._ready) < self.min_ready_chunks_before_start:
                         # No timeout, no keepalive spam - user controls disconnect via Stop button
-                        await asyncio.sleep(0.5)  # Проверяем каждые 0.5 сек
+                        self._ready_event.clear()
+                        await self._ready_event.wait()
 
                     self.playback_started = True
                     self.logger.info(
                         f"🚀 BUFFER READY! Starting NON-STOP playback with "
-                        f"{self.ready_queue.qsize()} chunks buffered"
+                        f"{len(self._ready)} chunks buffered"
                     )
 
                 # Берем следующий готовый батч из очереди (ждем если пусто)
                 # Heartbeat keepalive runs in a separate _heartbeat_loop() task.
-                batch = await self.ready_queue.get()
+                while not self._ready:
+                    self._ready_event.clear()
+                    await self._ready_event.wait()
+                batch = self._ready.popleft()
 
                 # Логируем состояние очереди
-                queue_size = self.ready_queue.qsize()
+                queue_size = len(self._ready)
                 buffer_size = len(self.completed_chunks_buffer)
                 if queue_size == 0:
                     self.logger.warning(
@@ -567,9 +804,6 @@ class BatchQueue:
                 # Воспроизводим
                 await self._play_batch(batch)
 
-                # Помечаем задачу как выполненную
-                self.ready_queue.task_done()
-
             except asyncio.CancelledError:
                 self.logger.info("Playback loop cancelled")
                 break
@@ -611,7 +845,7 @@ class BatchQueue:
             elapsed = time.time() - loop_start
             try:
                 await self.websocket.send_json({"type": "heartbeat"})
-                self.logger.debug(f"💓 Heartbeat #{heartbeat_count} sent (session {elapsed:.0f}s elapsed)")
+                self.logger.debug("💓 Heartbeat #%d sent (session %.0fs elapsed)", heartbeat_count, elapsed)
             except Exception as e:
                 self.logger.error(
                     f"💓 Heartbeat #{heartbeat_count} FAILED after {elapsed:.0f}s: "
@@ -674,11 +908,17 @@ class BatchQueue:
                 - translated: русский перевод
                 - audio: WAV байты
                 - duration: длительность аудио
+
+        Клиенту уходит одно сообщение {"type": "batch", ...} с ключами
+        transcription / translation / audio_output (заголовок: seq, duration, формат PCM) /
+        metrics, сразу за ним binary frame с WAV, затем (после воспроизведения)
+        финальное обновление metrics.
         """
         try:
             chunk_id = batch.get('chunk_id', '?')
-            queue_size = self.ready_queue.qsize()
-            current_time = time.strftime('%H:%M:%S')
+            queue_size = len(self._ready)
+            now = time.time()  # одно чтение часов на весь батч (lag + timestamp)
+            current_time = time.strftime('%H:%M:%S', time.localtime(now))
 
             self.logger.info(
                 f"\n╔═══ ▶️  PLAYBACK START [{current_time}] ═══╗\n"
@@ -688,24 +928,9 @@ class BatchQueue:
                 f"╚{'═' * 40}╝"
             )
 
-            # Отправляем транскрипцию
-            await self.websocket.send_json({
-                "type": "transcription",
-                "text": batch["original"],
-                "timestamp": time.time()
-            })
-
-            # Отправляем перевод
-            await self.websocket.send_json({
-                "type": "translation",
-                "original": batch["original"],
-                "translated": batch["translated"],
-                "timestamp": time.time()
-            })
-
             # --- Адаптивное ускорение (XTTS + Fish Speech) ---
             # Считаем лаг: сколько секунд чанк ждал + сколько ещё в очереди
-            chunk_lag = time.time() - batch.get("timestamp", time.time())
+            chunk_lag = now - batch.get("timestamp", now)
             total_lag = chunk_lag + sum(
                 b.get("duration", 3.0) for b in list(self.completed_chunks_buffer.values())
                 if b is not None
@@ -722,21 +947,14 @@ class BatchQueue:
                 _effective = _adaptive  # XTTS: только adaptive поверх уже сжатого аудио
 
             if _effective > 1.001:
-                play_audio = _apply_atempo(batch["audio"], _effective)
+                # ffmpeg subprocess — в потоке, чтобы не блокировать event loop
+                play_audio = await asyncio.to_thread(_apply_atempo, batch["audio"], _effective)
                 play_duration = batch["duration"] / _effective
                 self.logger.info(f"⚡ Adaptive speed {_effective:.1f}x (lag={total_lag:.1f}s, queue={queue_size}) → {batch['duration']:.1f}s → {play_duration:.1f}s")
             else:
                 play_audio = batch["audio"]
                 play_duration = batch["duration"]
 
-            # Отправляем аудио
-            await self.websocket.send_json({
-                "type": "audio_output",
-                "data": base64.b64encode(play_audio).decode(),
-                "duration": play_duration,
-                "timestamp": time.time()
-            })
-
             # Отправляем обновленные метрики
             metrics_data = self.metrics.get_summary()
             # Add latency fields compatible with UI expected format:
@@ -746,31 +964,66 @@ class BatchQueue:
             # metrics.get_summary() returns "latency_avg" key.
             # Let's map it for UI compatibility.
             ui_metrics = {
-                "type": "metrics",
-                "data": {
-                    "latency": metrics_data["latency_avg"],
-                    "batches_processed": self.metrics.batches_processed,
-                    "uptime": metrics_data["session_duration"],
-                    "slots": self.get_status()["slots"]
-                }
+                "latency": metrics_data["latency_avg"],
+                "batches_processed": self.metrics.batches_processed,
+                "uptime": metrics_data["session_duration"],
+                "slots": self.get_status()["slots"]
             }
-            await self.websocket.send_json(ui_metrics)
 
-            # Ждём окончания воспроизведения (с учётом browser playback speed)
+            # На провод идёт сырой PCM s16le (без WAV заголовка): клиент собирает
+            # AudioBuffer сам, без decodeAudioData. Не-16-bit WAV — как есть
+            audio_header = {"seq": self._audio_seq, "duration": play_duration}
+            try:
+                wire_audio, sample_rate, channels = wav_pcm16(play_audio)
+                audio_header.update(format="pcm_s16le", sample_rate=sample_rate, channels=channels)
+            except ValueError:
+                wire_audio = play_audio
+
+            # Транскрипция + перевод + аудио + метрики — ОДНО сообщение "batch"
+            # (один frame вместо четырёх; клиент раскладывает по ключам)
+            await self.websocket.send_json({
+                "type": "batch",
+                "timestamp": now,
+                "transcription": {
+                    "text": batch["original"]
+                },
+                "translation": {
+                    "original": batch["original"],
+                    "translated": batch["translated"]
+                },
+                "audio_output": audio_header,
+                "metrics": ui_metrics
+            })
+            # Аудио идёт следующим binary frame (без base64): клиент сопоставляет
+            # его с audio_output заголовком по порядку, seq — для логов/проверки
+            seq = self._audio_seq
+            await self.websocket.send_bytes(wire_audio)
+            self._audio_seq += 1
+
+            # Темп воспроизведения (с учётом browser playback speed).
+            # С ACK держим один чанк в запасе: ждём окончания ПРЕДЫДУЩЕГО чанка,
+            # поэтому следующий уходит, пока этот ещё играет (без паузы RTT на
+            # стыке). Без ACK — sleep(duration) как раньше
             effective_sleep = play_duration / max(self.browser_speed, 0.5)
-            await asyncio.sleep(effective_sleep)
+            if self._client_acks:
+                await self._wait_audio_ack(seq - 1, timeout=self._prev_play_sleep * 1.5 + 1.0)
+            else:
+                await asyncio.sleep(effective_sleep)
+            self._prev_play_sleep = effective_sleep
 
             # Увеличиваем счётчик обработанных батчей
             self.metrics.batches_processed += 1
 
             # FINAL METRICS UPDATE (to show updated batch count)
-            final_metrics = self.metrics.get_summary()
+            # Сводку второй раз не строим: latency из pre-sleep get_summary(),
+            # меняются только счётчик, uptime и слоты (новый dict — первый
+            # мог ещё не сериализоваться writer-ом)
             await self.websocket.send_json({
                 "type": "metrics",
                 "data": {
-                    "latency": final_metrics["latency_avg"],
+                    "latency": ui_metrics["latency"],
                     "batches_processed": self.metrics.batches_processed,
-                    "uptime": final_metrics["session_duration"],
+                    "uptime": self.metrics.session_uptime(),
                     "slots": self.get_status()["slots"]
                 }
             })
@@ -789,7 +1042,44 @@ class BatchQueue:
             if batch.get('_pipeline_semaphore_acquired'):
                 self.pipeline_semaphore.release()
                 slots_available = self.pipeline_semaphore._value
-                self.logger.info(f"✅ Pipeline slot released (available: {slots_available}/{self.max_concurrent_batches}, processing: {self.processing_count}, ready: {self.ready_queue.qsize()})")
+                self.logger.info(f"✅ Pipeline slot released (available: {slots_available}/{self.max_concurrent_batches}, processing: {self.processing_count}, ready: {len(self._ready)})")
+
+    def on_audio_done(self, seq: int) -> None:
+        """
+        ACK от клиента: чанк seq доиграл (сообщение "audio_done").
+
+        Первый ACK переключает _play_batch с sleep(duration) на ожидание ACK
+        предыдущего чанка (один чанк в запасе у клиента).
+        ACK для ещё не отправленного чанка (хвост прошлой сессии, баг клиента)
+        игнорируется — иначе _acked_seq убежал бы вперёд и отключил pacing.
+        """
+        if not 0 <= seq < self._audio_seq:
+            self.logger.warning(f"⚠️ Ignoring audio_done for unsent seq {seq} (sent: {self._audio_seq})")
+            return
+        self._client_acks = True
+        if seq > self._acked_seq:
+            self._acked_seq = seq
+            self._ack_event.set()
+
+    async def _wait_audio_ack(self, seq: int, timeout: float) -> None:
+        """
+        Ждёт ACK для чанка seq (или более позднего), не дольше timeout.
+
+        Timeout — страховка от потерянного ACK (вкладка в фоне, старый клиент):
+        конвейер продолжает работу как при sleep.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self._acked_seq < seq:
+            self._ack_event.clear()
+            remaining = deadline - loop.time()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                await asyncio.wait_for(self._ack_event.wait(), remaining)
+            except asyncio.TimeoutError:
+                self.logger.warning(f"⏱️ No audio_done ACK for seq {seq} within {timeout:.1f}s — continuing")
+                return
 
     async def stop_playback_loop(self) -> None:
         """
@@ -814,6 +1104,21 @@ class BatchQueue:
             except asyncio.CancelledError:
                 pass
 
+        # Останавливаем пул обработки; ещё не начатые работы отбрасываем
+        for task in self._worker_tasks:
+            task.cancel()
+        for task in self._worker_tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._worker_tasks = []
+        while not self._work_queue.empty():
+            self._work_queue.get_nowait()
+            self._work_queue.task_done()
+        await self.stt_stage.stop()
+        await self.translation_stage.stop()
+
         # КРИТИЧНО: Очищаем sequential buffer между сессиями
         # (иначе chunks из старой сессии будут ждать в buffer)
         self.completed_chunks_buffer.clear()
@@ -846,9 +1151,9 @@ class BatchQueue:
         Обрабатывает батч через STT → LLM → TTS pipeline с конвейерной обработкой.
 
         КОНВЕЙЕРНАЯ АРХИТЕКТУРА:
-        - STEP 1 (STT): Только 1 батч за раз через whisper_semaphore
-        - STEP 2 (Translation): Только 1 батч за раз через translation_semaphore
-        - STEP 3 (TTS): Только 1 батч за раз через tts_semaphore
+        - STEP 1 (STT): Только 1 батч за раз (stt_stage, 1 worker)
+        - STEP 2 (Translation): До 3 батчей параллельно (translation_stage, 3 worker-а)
+        - STEP 3 (TTS): Параллелизм задаёт TTS worker pool
 
         Это позволяет разным батчам быть на разных этапах одновременно:
         - Батч #1: TTS
@@ -862,6 +1167,8 @@ class BatchQueue:
         Returns:
             Dict с результатами обработки
         """
+        # Задержки стадий копим локально и пишем в метрики одним вызовом
+        latencies: Dict[str, float] = {}
         try:
             pipeline_start = time.time()
 
@@ -874,12 +1181,13 @@ class BatchQueue:
                 return None
 
             # STEP 1: STT (Local Whisper on GPU or Groq)
-            async with self.whisper_semaphore:
+            async def _stt_step():
                 start = time.time()
                 self.logger.info(f"🎧 Chunk #{chunk_id} → WHISPER (RMS={rms:.3f})...")
-                transcription = await self.whisper_client.transcribe(audio_array)
+                transcription = await self._call_with_timeout(
+                    "stt", self.whisper_client.transcribe(audio_array), self.stt_timeout, shield=True
+                )
                 stt_duration = time.time() - start
-                self.metrics.record_latency("stt", stt_duration)
                 lang_label = transcription.get("language", "?")
                 lang_conf = transcription.get("language_probability", 0)
                 self.logger.info(
@@ -887,6 +1195,10 @@ class BatchQueue:
                     f"(lang={lang_label}, conf={lang_conf:.2f})\n"
                     f"   📝 STT FULL: \"{transcription['text']}\""
                 )
+                return transcription, stt_duration
+
+            transcription, stt_duration = await self.stt_stage.run(_stt_step)
+            latencies["stt"] = stt_duration
 
             # ФИЛЬТР ЯЗЫКА: главный язык — английский, но переводим всё кроме русского.
             # Русский пропускаем ТОЛЬКО если Whisper уверен (confidence > 0.80).
@@ -995,19 +1307,21 @@ class BatchQueue:
             effective_topic = self.topic or ""
             if buffer_metadata:
                 effective_topic = f"{effective_topic} {buffer_metadata}".strip()
-            async with self.translation_semaphore:
+            async def _translation_step():
                 start = time.time()
                 self.logger.info(f"🌐 Chunk #{chunk_id} → TRANSLATION...")
                 context = await self.context_buffer.get_context()
-                translation = await self.openrouter_client.translate(
-                    stt_text, context, topic=effective_topic if effective_topic else None
+                translation = await self._call_with_timeout(
+                    "translation",
+                    self.openrouter_client.translate(
+                        stt_text, context, topic=effective_topic if effective_topic else None
+                    ),
+                    self.translation_timeout
                 )
                 translation_duration = time.time() - start
-                self.metrics.record_latency("translation", translation_duration)
 
                 # STRIP MARKDOWN: убираем **bold** и другие маркеры перед TTS
-                translation = re.sub(r'\*\*(.+?)\*\*', r'\1', translation)
-                translation = translation.replace('*', '').replace('`', '').strip()
+                translation = _strip_markdown(translation)
 
                 self.logger.info(
                     f"   ✅ TRANSLATION done: {translation_duration:.2f}s\n"
@@ -1024,47 +1338,46 @@ class BatchQueue:
                 # Добавляем EN+RU пару в контекст (для живого нарратива)
                 # Используем stt_text (из SmartBuffer, может быть склеен) для контекста
                 await self.context_buffer.add_pair(stt_text, translation)
+                return translation, translation_duration
+
+            translation, translation_duration = await self.translation_stage.run(_translation_step)
+            latencies["translation"] = translation_duration
 
             # STEP 3: TTS (Worker Pool - parallel processing on 2 GPUs)
             start = time.time()
             self.logger.info(f"🔊 Chunk #{chunk_id} → TTS (dispatching to worker pool)...")
 
-            # Выбираем метод синтеза (worker pool или legacy direct engine)
-            if self.tts_worker_pool:
-                audio_bytes = await self.tts_worker_pool.synthesize(translation)
-            else:
-                audio_bytes = await self.xtts_engine.synthesize(translation)
+            # Синтез через worker pool или legacy direct engine (см. _synthesize)
+            audio_bytes = await self._call_with_timeout(
+                "tts", self._synthesize(translation), self.tts_timeout, shield=True
+            )
 
             tts_duration = time.time() - start
-            self.metrics.record_latency("tts", tts_duration)
+            latencies["tts"] = tts_duration
             self.logger.info(f"   ✅ TTS done: {tts_duration:.2f}s")
 
-            # Вычисляем длительность аудио из WAV header
-            # Получаем sample rate из конфига (worker pool не имеет direct access к engine)
-            tts_config = load_config()["models"]["tts"]
-            tts_sample_rate = tts_config.get("output_sample_rate", 24000)
-            audio_data_size = len(audio_bytes) - 44  # Subtract WAV header
-            audio_duration = audio_data_size / (tts_sample_rate * 2)  # 2 bytes/sample (int16)
+            # Вычисляем длительность аудио из WAV header (fmt/data chunks —
+            # sample rate берётся из самого файла, а не из конфига)
+            audio_duration = wav_duration(audio_bytes)
 
             # E2E метрика
             e2e_duration = stt_duration + translation_duration + tts_duration
             pipeline_total = time.time() - pipeline_start
-            self.metrics.record_latency("e2e", e2e_duration)
+            latencies["e2e"] = e2e_duration
 
             # Detailed pipeline summary
-            audio_samples = (len(audio_bytes) - 44) / 2  # int16 samples
             input_duration = len(audio_array) / 16000  # Input audio duration
             self.logger.info(
                 f"\n╔═══ CHUNK #{chunk_id} PIPELINE COMPLETE ═══╗\n"
                 f"║ INPUT:  {input_duration:.1f}s audio\n"
-                f"║ OUTPUT: {audio_duration:.1f}s TTS ({int(audio_samples)} samples)\n"
+                f"║ OUTPUT: {audio_duration:.1f}s TTS\n"
                 f"║ ─────────────────────────────────────\n"
                 f"║ WHISPER:     {stt_duration:6.2f}s\n"
                 f"║ TRANSLATION: {translation_duration:6.2f}s\n"
                 f"║ TTS:         {tts_duration:6.2f}s\n"
                 f"║ ─────────────────────────────────────\n"
                 f"║ E2E TOTAL:   {e2e_duration:6.2f}s\n"
-                f"║ Ready queue: {self.ready_queue.qsize()} chunks\n"
+                f"║ Ready queue: {len(self._ready)} chunks\n"
                 f"╚{'═' * 40}╝"
             )
 
@@ -1084,6 +1397,10 @@ class BatchQueue:
             self.logger.error(f"Batch processing failed: {e}")
             raise  # Пробрасываем выше
 
+        finally:
+            if latencies:
+                self.metrics.record_batch_latencies(**latencies)
+
     def get_status(self) -> Dict[str, Any]:
         """
         Возвращает текущий статус очереди (для UI dashboard).
@@ -1107,7 +1424,7 @@ class BatchQueue:
         if self.is_running:
             slots_status.append({"slot": 1, "status": "playing"})
 
-        ready_count = self.ready_queue.qsize()
+        ready_count = len(self._ready)
         if ready_count > 0:
             slots_status.append({"slot": 2, "status": "ready"})
 
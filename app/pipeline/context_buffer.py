@@ -3,7 +3,6 @@
 Хранит последние N пар (english, russian) для живого нарратива.
 """
 
-import asyncio
 from collections import deque
 from typing import List, Dict
 from app.config import load_config
@@ -30,8 +29,11 @@ class ContextBuffer:
         # Буфер хранит dict {"en": str, "ru": str}
         self.buffer: deque = deque(maxlen=self.window_size)
 
-        # Lock для async операций
-        self.lock = asyncio.Lock()
+        # Суммарная длина EN+RU всех пар в буфере (ведётся при append/вытеснении)
+        self.total_chars = 0
+
+        # Без asyncio.Lock: один event loop, внутри методов нет await —
+        # каждый метод и так выполняется атомарно
 
         self.logger.info(f"ContextBuffer initialized: window={self.window_size}, max_chars={self.max_chars}")
 
@@ -43,9 +45,13 @@ class ContextBuffer:
             english: Оригинальный английский текст
             russian: Переведённый русский текст
         """
-        async with self.lock:
-            self.buffer.append({"en": english.strip(), "ru": russian.strip()})
-            self.logger.debug(f"Context pair added: EN={english[:40]}... RU={russian[:40]}...")
+        pair = {"en": english.strip(), "ru": russian.strip()}
+        if len(self.buffer) == self.window_size:
+            evicted = self.buffer[0]  # deque(maxlen) вытеснит его при append
+            self.total_chars -= len(evicted["en"]) + len(evicted["ru"])
+        self.buffer.append(pair)
+        self.total_chars += len(pair["en"]) + len(pair["ru"])
+        self.logger.debug("Context pair added: EN=%s... RU=%s...", english[:40], russian[:40])
 
     async def get_context(self) -> List[Dict[str, str]]:
         """
@@ -56,19 +62,21 @@ class ContextBuffer:
         Returns:
             List[Dict]: Список пар, от старых к новым
         """
-        async with self.lock:
-            context = list(self.buffer)
+        # Обычный случай: лимит не превышен — просто копия буфера
+        if self.total_chars <= self.max_chars:
+            return list(self.buffer)
 
-            # Обрезаем по символам если превышает лимит (считаем EN + RU)
-            total_chars = sum(len(p["en"]) + len(p["ru"]) for p in context)
-            while total_chars > self.max_chars and len(context) > 0:
-                removed = context.pop(0)
-                total_chars -= len(removed["en"]) + len(removed["ru"])
+        # Обрезаем по символам (считаем EN + RU), удаляя старые пары с начала
+        context = self.buffer.copy()
+        total_chars = self.total_chars
+        while total_chars > self.max_chars and context:
+            removed = context.popleft()
+            total_chars -= len(removed["en"]) + len(removed["ru"])
 
-            return context
+        return list(context)
 
     async def clear(self) -> None:
         """Очищает буфер."""
-        async with self.lock:
-            self.buffer.clear()
-            self.logger.info("Context buffer cleared")
+        self.buffer.clear()
+        self.total_chars = 0
+        self.logger.info("Context buffer cleared")
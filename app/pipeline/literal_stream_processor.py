@@ -12,9 +12,10 @@ import numpy as np
 import asyncio
 import time
 from collections import deque
+from typing import Optional
 from app.config import load_config
 from app.monitoring.logger import setup_logger
-from app.components.audio_utils import int16_to_float32, normalize_audio
+from app.components.audio_utils import int16_to_float32_peak, normalize_audio
 from app.components.vad_detector import VADDetector
 from app.pipeline.batch_queue import BatchQueue
 
@@ -41,7 +42,6 @@ class LiteralStreamProcessor:
 
         buffer_size = self.sample_rate * self.config["audio"]["buffer_duration_sec"]
         self.audio_buffer = deque(maxlen=buffer_size)
-        self.current_phrase = []
         self.phrase_start_time = None
 
         self.lock = asyncio.Lock()
@@ -51,11 +51,24 @@ class LiteralStreamProcessor:
         self.max_chunk_duration = 4.0  # Максимум 4 секунды - ПРИНУДИТЕЛЬНОЕ закрытие (было: 3.0)
         self.min_silence_duration = 0.5  # 0.5 секунды тишины = закрыть чанк (было: 1.0)
 
+        # Текущая фраза: предвыделенный float32 буфер + курсор записи вместо
+        # list.extend() (boxing каждого сэмпла в Python float). Запас +1s —
+        # чанки приходят пачками; если не хватит, _append_phrase() расширит
+        self._phrase_buf = np.empty(
+            int(self.max_chunk_duration * self.sample_rate) + self.sample_rate, dtype=np.float32
+        )
+        self._phrase_len = 0
+        self._phrase_peak = 0.0  # max |x| по чанкам фразы (для normalize_audio)
+
         self.logger.info(
             f"LiteralStreamProcessor: chunks {self.min_chunk_duration}-{self.max_chunk_duration}s, "
             f"silence {self.min_silence_duration}s"
         )
 
+    def close(self) -> None:
+        """Освобождает ресурсы процессора (VAD поток)."""
+        self.vad.close()
+
     async def process_chunk(self, audio_bytes: bytes) -> None:
         """
         Обрабатывает входящий аудио чанк в БЫСТРОМ РЕЖИМЕ.
@@ -70,26 +83,29 @@ class LiteralStreamProcessor:
         async with self.lock:
             # Конвертируем bytes → numpy
             audio_int16 = np.frombuffer(audio_bytes, dtype=np.int16)
-            audio_float = int16_to_float32(audio_int16)
+            # Конверсия + пик чанка одним проходом (пик фразы → normalize_audio)
+            audio_float, chunk_peak = int16_to_float32_peak(audio_int16)
 
             self.audio_buffer.extend(audio_float)
 
             # VAD детекция
-            is_speech = self.vad.detect_speech(audio_float)
+            is_speech = await self.vad.detect_speech_async(audio_float)
 
             # Начало новой фразы
             if is_speech and self.phrase_start_time is None:
                 self.phrase_start_time = time.time()
                 self.logger.debug(
-                    f"🎤 New phrase (max {self.max_chunk_duration}s, "
-                    f"forced closure at {self.max_chunk_duration}s)"
+                    "🎤 New phrase (max %ss, forced closure at %ss)",
+                    self.max_chunk_duration, self.max_chunk_duration
                 )
 
             should_finalize = False
             phrase_to_finalize = None
 
             if self.phrase_start_time is not None:
-                self.current_phrase.extend(audio_float)
+                self._append_phrase(audio_float)
+                if chunk_peak > self._phrase_peak:
+                    self._phrase_peak = chunk_peak
                 phrase_duration = time.time() - self.phrase_start_time
 
                 # БЫСТРАЯ ОБРАБОТКА: меньшие чанки, короткие паузы
@@ -129,21 +145,36 @@ class LiteralStreamProcessor:
 
                 # Финализация
                 if should_finalize:
-                    phrase_to_finalize = self.current_phrase.copy()
-                    self.current_phrase = []
+                    # Копия: буфер переиспользуется следующей фразой
+                    phrase_to_finalize = self._phrase_buf[:self._phrase_len].copy()
+                    phrase_peak = self._phrase_peak
+                    self._phrase_len = 0
+                    self._phrase_peak = 0.0
                     self.phrase_start_time = None
                     self.vad.reset()
 
         # Финализируем ВНЕ блокировки
-        if should_finalize and phrase_to_finalize:
-            await self.finalize_phrase(phrase_to_finalize)
-
-    async def finalize_phrase(self, phrase_data: list) -> None:
+        if should_finalize and phrase_to_finalize is not None and len(phrase_to_finalize):
+            await self.finalize_phrase(phrase_to_finalize, phrase_peak)
+
+    def _append_phrase(self, audio_float: np.ndarray) -> None:
+        """Дописывает сэмплы в буфер фразы (memcpy), при нехватке места удваивает буфер."""
+        n = audio_float.shape[0]
+        end = self._phrase_len + n
+        if end > self._phrase_buf.shape[0]:
+            grown = np.empty(max(end, 2 * self._phrase_buf.shape[0]), dtype=np.float32)
+            grown[:self._phrase_len] = self._phrase_buf[:self._phrase_len]
+            self._phrase_buf = grown
+        self._phrase_buf[self._phrase_len:end] = audio_float
+        self._phrase_len = end
+
+    async def finalize_phrase(self, phrase_data: np.ndarray, peak: Optional[float] = None) -> None:
         """
         Финализирует фразу и отправляет на обработку.
 
         Args:
-            phrase_data: Список аудио семплов
+            phrase_data: Аудио фразы (float32, собственная копия — нормализуется на месте)
+            peak: Пик |x| фразы, накопленный при приёме чанков (None — посчитать)
         """
         import time
         finalize_start = time.time()
@@ -154,12 +185,11 @@ class LiteralStreamProcessor:
 
         if len(phrase_data) < min_samples:
             self.logger.debug(
-                f"Phrase too short: {len(phrase_data)/self.sample_rate:.1f}s, skipping"
+                "Phrase too short: %.1fs, skipping", len(phrase_data) / self.sample_rate
             )
             return
 
-        phrase_array = np.array(phrase_data, dtype=np.float32)
-        phrase_array = normalize_audio(phrase_array)
+        phrase_array = normalize_audio(phrase_data, peak=peak)
 
         duration = len(phrase_array) / self.sample_rate
 
@@ -176,4 +206,4 @@ class LiteralStreamProcessor:
         await self.batch_queue.add_batch(phrase_array)
 
         finalize_time = time.time() - finalize_start
-        self.logger.debug(f"  → Finalize took {finalize_time*1000:.1f}ms")
+        self.logger.debug("  → Finalize took %.1fms", finalize_time * 1000)
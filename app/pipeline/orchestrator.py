@@ -93,6 +93,11 @@ class Orchestrator:
             # Останавливаем TTS worker pool (если используется)
             self.batch_queue.shutdown()
 
+        # VAD-based процессоры держат выделенный поток — освобождаем
+        close = getattr(self.stream_processor, "close", None)
+        if close:
+            close()
+
         self.batch_queue = None
         self.stream_processor = None
     
@@ -118,7 +123,7 @@ class Orchestrator:
         return {
             "session_active": self.session_active,
             "batches_processed": self.metrics.batches_processed,
-            "uptime": time.time() - self.metrics.session_start,
+            "uptime": self.metrics.session_uptime(),
             "latency": summary["latency_avg"],
             "errors": summary["errors"],
             "vram_mb": summary["vram_current_mb"]
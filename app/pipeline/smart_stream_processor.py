@@ -25,6 +25,7 @@ RESULT: Each emitted chunk ends at a natural Whisper segment boundary
 """
 
 import asyncio
+import logging
 import numpy as np
 from app.monitoring.logger import setup_logger
 
@@ -248,12 +249,14 @@ class SmartStreamProcessor:
             import time as _time3
             self._whisper_run_count += 1
             run_num = self._whisper_run_count
-            self.logger.debug(f"🎙️ Whisper run #{run_num} START (buffer {len(audio_snapshot)/self.SAMPLE_RATE:.1f}s)")
+            self.logger.debug("🎙️ Whisper run #%d START (buffer %.1fs)", run_num, len(audio_snapshot) / self.SAMPLE_RATE)
             whisper_start = _time3.time()
             try:
                 committed_text = await self._run_process_iter(audio_snapshot, offset_snapshot)
                 whisper_elapsed = _time3.time() - whisper_start
-                self.logger.debug(f"🎙️ Whisper run #{run_num} DONE in {whisper_elapsed:.2f}s → committed: '{committed_text.strip() if committed_text else ''}'")
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug("🎙️ Whisper run #%d DONE in %.2fs → committed: '%s'",
+                                      run_num, whisper_elapsed, committed_text.strip() if committed_text else '')
             except Exception as e:
                 import traceback as _tb
                 self.logger.error(f"🔴 Whisper run #{run_num} EXCEPTION: {type(e).__name__}: {e}\n{''.join(_tb.format_exc())}")
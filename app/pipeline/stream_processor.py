@@ -2,6 +2,7 @@
 Модуль обработки входящего аудио потока.
 """
 
+import logging
 import numpy as np
 import asyncio
 import time
@@ -34,12 +35,23 @@ class StreamProcessor:
 
         self.lock = asyncio.Lock()
 
+        # Параметры чанкинга читаем один раз (process_chunk вызывается на каждые 100ms)
+        vad_config = self.config["vad"]
+        self.min_chunk_duration = vad_config["min_chunk_duration"]
+        self.max_phrase_duration = vad_config["max_phrase_duration"]
+        self.min_silence_duration = vad_config["min_silence_duration"]
+        self.min_silence_frames = int(self.min_silence_duration * 10)
+
         # Log current VAD settings
-        min_chunk = self.config["vad"]["min_chunk_duration"]
-        max_chunk = self.config["vad"]["max_phrase_duration"]
-        min_silence = self.config["vad"]["min_silence_duration"]
-        self.logger.info(f"StreamProcessor initialized (FAT chunks: {min_chunk}-{max_chunk}s, silence: {min_silence}s)")
+        self.logger.info(
+            f"StreamProcessor initialized (FAT chunks: {self.min_chunk_duration}-{self.max_phrase_duration}s, "
+            f"silence: {self.min_silence_duration}s)"
+        )
     
+    def close(self) -> None:
+        """Освобождает ресурсы процессора (VAD поток)."""
+        self.vad.close()
+
     async def process_chunk(self, audio_bytes: bytes) -> None:
         """
         Обрабатывает входящий аудио чанк.
@@ -60,14 +72,15 @@ class StreamProcessor:
             self.audio_buffer.extend(audio_float)
 
             # VAD детекция (обновляет счётчики speech_frames/silence_frames)
-            is_speech = self.vad.detect_speech(audio_float)
+            is_speech = await self.vad.detect_speech_async(audio_float)
 
             # Начало новой фразы - первая речь
             if is_speech and self.phrase_start_time is None:
                 self.phrase_start_time = time.time()
-                min_chunk = self.config["vad"]["min_chunk_duration"]
-                min_silence = self.config["vad"]["min_silence_duration"]
-                self.logger.info(f"🎤 New phrase started (FAT chunk: {min_chunk}s min, silence: {min_silence}s)")
+                self.logger.info(
+                    f"🎤 New phrase started (FAT chunk: {self.min_chunk_duration}s min, "
+                    f"silence: {self.min_silence_duration}s)"
+                )
 
             # Пока фраза активна - добавляем ВСЁ аудио (и речь, и паузы)
             should_finalize = False
@@ -78,14 +91,15 @@ class StreamProcessor:
                 phrase_duration = time.time() - self.phrase_start_time
 
                 # ВАЖНО: min_chunk и max_chunk из конфига (FAT chunks для перекрытия processing time)
-                min_chunk = self.config["vad"]["min_chunk_duration"]  # 12.0 сек
-                max_chunk = self.config["vad"]["max_phrase_duration"]  # 18.0 сек
+                min_chunk = self.min_chunk_duration  # 12.0 сек
+                max_chunk = self.max_phrase_duration  # 18.0 сек
 
                 # Логируем прогресс каждые 3 секунды (для диагностики)
-                if int(phrase_duration) % 3 == 0 and int(phrase_duration) > 0:
+                if int(phrase_duration) % 3 == 0 and int(phrase_duration) > 0 and self.logger.isEnabledFor(logging.DEBUG):
                     silence_frames = self.vad.silence_frames
-                    min_silence_frames = int(self.config["vad"]["min_silence_duration"] * 10)
-                    self.logger.debug(f"⏱️ Phrase progress: {phrase_duration:.1f}s (silence: {silence_frames}/{min_silence_frames} frames, min_chunk: {min_chunk}s)")
+                    min_silence_frames = self.min_silence_frames
+                    self.logger.debug("⏱️ Phrase progress: %.1fs (silence: %d/%d frames, min_chunk: %ss)",
+                                      phrase_duration, silence_frames, min_silence_frames, min_chunk)
 
                 # КРИТИЧНО: ФИНАЛИЗАЦИЯ ТОЛЬКО ЕСЛИ ФРАЗА >= min_chunk (9 сек)!
                 # До 9 секунд - ИГНОРИРУЕМ ТИШИНУ ПОЛНОСТЬЮ
@@ -93,7 +107,7 @@ class StreamProcessor:
                     # ДО МИНИМУМА - НЕ ПРОВЕРЯЕМ ТИШИНУ, ПРОСТО НАКАПЛИВАЕМ
                     # Логируем что накапливаем (каждые 3 сек)
                     if int(phrase_duration) % 3 == 0 and int(phrase_duration) > 0:
-                        self.logger.debug(f"📦 Accumulating (before min_chunk): {phrase_duration:.1f}s / {min_chunk}s")
+                        self.logger.debug("📦 Accumulating (before min_chunk): %.1fs / %ss", phrase_duration, min_chunk)
                     pass  # should_finalize остается False
 
                 elif phrase_duration >= max_chunk:
@@ -105,14 +119,15 @@ class StreamProcessor:
                     # ЗОНА ПОИСКА ТИШИНЫ: 9-13 сек
                     # Ищем логичный разрыв (тишина 1 сек)
                     if self.vad.is_silence_ready():
-                        self.logger.info(f"✂️ Chunk ready: {phrase_duration:.1f}s (silence {self.config['vad']['min_silence_duration']}s detected in range {min_chunk}-{max_chunk}s)")
+                        self.logger.info(f"✂️ Chunk ready: {phrase_duration:.1f}s (silence {self.min_silence_duration}s detected in range {min_chunk}-{max_chunk}s)")
                         should_finalize = True
                     else:
                         # Нет тишины - продолжаем накапливать (логируем каждые 2 сек)
-                        if int(phrase_duration) % 2 == 0:
+                        if int(phrase_duration) % 2 == 0 and self.logger.isEnabledFor(logging.DEBUG):
                             silence_frames = self.vad.silence_frames
-                            min_silence_frames = int(self.config["vad"]["min_silence_duration"] * 10)
-                            self.logger.debug(f"⏳ Waiting for silence: {phrase_duration:.1f}s (silence: {silence_frames}/{min_silence_frames} frames)")
+                            min_silence_frames = self.min_silence_frames
+                            self.logger.debug("⏳ Waiting for silence: %.1fs (silence: %d/%d frames)",
+                                              phrase_duration, silence_frames, min_silence_frames)
 
                 # Подготавливаем данные для финализации ПОД БЛОКИРОВКОЙ
                 if should_finalize:
@@ -0,0 +1,140 @@
+"""
+Модуль буферизированной отправки сообщений в WebSocket.
+Склеивает мелкие JSON события пайплайна в один frame.
+"""
+
+import asyncio
+import json
+from typing import Any, Dict, List, Optional
+from app.config import load_config
+from app.monitoring.logger import setup_logger
+
+# orjson (опционально) — в 2-5 раз быстрее stdlib json на маленьких dict
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps(payload: Any) -> str:
+    """JSON сериализация (тот же компактный формат, что у Starlette send_json)."""
+    if orjson is not None:
+        return orjson.dumps(payload).decode("utf-8")
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+
+class BatchedWebSocketSender:
+    """
+    Обёртка над WebSocket с тем же интерфейсом send_json(), но с одним
+    writer task на соединение.
+
+    Функционал:
+        - send_json() кладёт сообщение в очередь и сразу возвращается
+        - writer забирает до max_batch сообщений, пришедших в пределах
+          flush_interval, и отправляет их ОДНИМ text frame (JSON массив)
+        - одиночное сообщение уходит как обычный объект (без массива)
+        - send_bytes() ставит binary frame в ту же очередь: порядок относительно
+          JSON сообщений сохраняется (накопленная пачка уходит перед ним)
+        - ошибка отправки запоминается и пробрасывается следующему send_json()
+          (heartbeat и др. видят закрытое соединение как раньше)
+
+    Параметры из config.yaml (server.ws_batching):
+        - flush_interval_ms: float
+        - max_batch: int
+    """
+
+    def __init__(self, websocket):
+        """
+        Args:
+            websocket: Starlette/FastAPI WebSocket
+        """
+        cfg = load_config()["server"].get("ws_batching", {})
+        self.logger = setup_logger(__name__)
+        self.websocket = websocket
+        self.flush_interval = cfg.get("flush_interval_ms", 5) / 1000.0
+        self.max_batch = cfg.get("max_batch", 16)
+
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._writer_task: Optional[asyncio.Task] = None
+        self._error: Optional[BaseException] = None
+
+    async def send_json(self, message: Dict[str, Any]) -> None:
+        """Ставит сообщение в очередь отправки."""
+        if self._error is not None:
+            raise self._error
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = asyncio.create_task(self._writer_loop())
+        self._queue.put_nowait(message)
+
+    async def send_bytes(self, data: bytes) -> None:
+        """Ставит binary frame в очередь отправки (после уже поставленных сообщений)."""
+        if self._error is not None:
+            raise self._error
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = asyncio.create_task(self._writer_loop())
+        self._queue.put_nowait(bytes(data) if isinstance(data, memoryview) else data)
+
+    async def flush(self) -> None:
+        """Ждёт, пока все поставленные в очередь сообщения будут отправлены."""
+        if self._writer_task is not None and not self._writer_task.done():
+            await self._queue.join()
+
+    async def close(self) -> None:
+        """Останавливает writer task (неотправленные сообщения отбрасываются)."""
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._writer_task = None
+
+    async def _writer_loop(self) -> None:
+        """Единственный писатель в WebSocket: собирает пачку и шлёт одним frame."""
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            binary: Optional[bytes] = None
+            batch: List[Dict[str, Any]] = []
+            if isinstance(item, (bytes, bytearray)):
+                binary = item
+            else:
+                batch.append(item)
+                deadline = loop.time() + self.flush_interval
+                while len(batch) < self.max_batch:
+                    try:
+                        item = self._queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        timeout = deadline - loop.time()
+                        if timeout <= 0:
+                            break
+                        try:
+                            item = await asyncio.wait_for(self._queue.get(), timeout)
+                        except asyncio.TimeoutError:
+                            break
+                    if isinstance(item, (bytes, bytearray)):
+                        # Binary frame закрывает пачку: сначала JSON, потом он
+                        binary = item
+                        break
+                    batch.append(item)
+
+            n_items = len(batch) + (binary is not None)
+            try:
+                if batch:
+                    payload = batch[0] if len(batch) == 1 else batch
+                    await self.websocket.send_text(_dumps(payload))
+                if binary is not None:
+                    await self.websocket.send_bytes(binary)
+            except Exception as e:
+                self._error = e
+                self.logger.warning(f"WebSocket send failed ({n_items} messages): {type(e).__name__}: {e}")
+            finally:
+                for _ in range(n_items):
+                    self._queue.task_done()
+
+            if self._error is not None:
+                # Соединение мертво — дренируем очередь, чтобы flush() не висел
+                while not self._queue.empty():
+                    self._queue.get_nowait()
+                    self._queue.task_done()
+                return
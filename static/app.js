@@ -9,6 +9,8 @@ let scriptNode = null;
 let isRecording = false;
 let currentSpeed = 1.0; // XTTS speed (1.0 = normal, 2.0 = max without distortion). Browser playbackRate NOT used.
 let autoRestart = false; // Auto-restart session after WS reconnect (if recording was active)
+let pendingAudioHeaders = []; // audio_output заголовки, ждущие своего binary frame с аудио
+const AUDIO_FRAME_TAG = 0x01; // Тег binary frame с PCM int16 (см. AUDIO_FRAME_TAG в app/main.py)
 
 // ============================================
 // LOGGING TO HTML CONSOLE
@@ -75,6 +77,8 @@ function connectWebSocket() {
     }
 
     ws = new WebSocket(wsUrl);
+    ws.binaryType = 'arraybuffer'; // WAV приходит binary frame-ом
+    pendingAudioHeaders = [];
     
     ws.onopen = () => {
         console.log('[WS] WebSocket connected to', wsUrl);
@@ -89,10 +93,26 @@ function connectWebSocket() {
     };
 
     ws.onmessage = (event) => {
+        if (event.data instanceof ArrayBuffer) {
+            // Binary frame = аудио для последнего audio_output заголовка
+            // (сырой PCM s16le если указан format, иначе WAV)
+            const header = pendingAudioHeaders.shift();
+            console.log('[MSG] Audio output received:', event.data.byteLength, 'bytes (seq', header ? header.seq : '?', ')');
+            if (header && header.format === 'pcm_s16le') {
+                playPcmBuffer(event.data, header.sample_rate, header.channels, header.seq);
+            } else {
+                playAudioBuffer(event.data, header ? header.seq : undefined);
+            }
+            return;
+        }
         console.log('[WS] Message received:', event.data.substring(0, 200));
-        const message = JSON.parse(event.data);
-        console.log('[WS] Parsed message type:', message.type);
-        handleMessage(message);
+        const payload = JSON.parse(event.data);
+        // Server batches several events into one frame as a JSON array
+        const messages = Array.isArray(payload) ? payload : [payload];
+        for (const message of messages) {
+            console.log('[WS] Parsed message type:', message.type);
+            handleMessage(message);
+        }
     };
 
     ws.onerror = (error) => {
@@ -138,6 +158,14 @@ function handleMessage(message) {
             console.log('[MSG] Session started');
             break;
 
+        case 'batch':
+            // Один frame на чанк: раскладываем на обычные сообщения по ключам
+            if (message.transcription) handleMessage({ type: 'transcription', timestamp: message.timestamp, ...message.transcription });
+            if (message.translation) handleMessage({ type: 'translation', timestamp: message.timestamp, ...message.translation });
+            if (message.audio_output) handleMessage({ type: 'audio_output', timestamp: message.timestamp, ...message.audio_output });
+            if (message.metrics) handleMessage({ type: 'metrics', data: message.metrics });
+            break;
+
         case 'transcription':
             console.log('[MSG] Transcription received:', message.text.substring(0, 100));
             appendTranscript('englishText', message.text);
@@ -149,6 +177,11 @@ function handleMessage(message) {
             break;
 
         case 'audio_output':
+            if (message.data === undefined) {
+                // Заголовок: сами байты придут следующим binary frame
+                pendingAudioHeaders.push(message);
+                break;
+            }
             console.log('[MSG] Audio output received:', message.data.length, 'bytes (base64)');
             playAudio(message.data);
             break;
@@ -185,34 +218,70 @@ function playAudio(base64Audio) {
     for (let i = 0; i < binaryString.length; i++) {
         bytes[i] = binaryString.charCodeAt(i);
     }
+    playAudioBuffer(bytes.buffer);
+}
 
+function ensureAudioContext() {
     // Создаём AudioContext если нужно
     if (!audioContext) {
         audioContext = new (window.AudioContext || window.webkitAudioContext)();
     }
+}
+
+function playAudioBuffer(wavBuffer, seq) {
+    ensureAudioContext();
 
     // Декодируем WAV
-    audioContext.decodeAudioData(bytes.buffer, (audioBuffer) => {
-        const source = audioContext.createBufferSource();
-        source.buffer = audioBuffer;
-        // NOTE: playbackRate intentionally NOT set here.
-        // Changing playbackRate also changes pitch → distorted voice.
-        // Speed is controlled server-side via XTTS speed parameter (no distortion).
-        source.connect(audioContext.destination);
-
-        // Scheduled queue: каждый чанк начинается ТОЧНО когда закончился предыдущий.
-        // Без этого source.start(0) = "сейчас" → перекрытие при быстрых чанках.
-        const now = audioContext.currentTime;
-        if (audioNextStartTime < now) {
-            audioNextStartTime = now + 0.05; // небольшой gap чтобы избежать щелчков
-        }
-        source.start(audioNextStartTime);
-        audioNextStartTime += audioBuffer.duration;
+    audioContext.decodeAudioData(wavBuffer, (audioBuffer) => {
+        scheduleAudioBuffer(audioBuffer, seq);
     }).catch(err => {
         console.error('Audio decode error:', err);
     });
 }
 
+function playPcmBuffer(pcmBuffer, sampleRate, channels, seq) {
+    // Сырой PCM s16le (interleaved) → AudioBuffer напрямую, без decodeAudioData
+    ensureAudioContext();
+    const samples = new Int16Array(pcmBuffer);
+    const frames = Math.floor(samples.length / channels);
+    if (frames === 0) return;
+    const audioBuffer = audioContext.createBuffer(channels, frames, sampleRate);
+    for (let ch = 0; ch < channels; ch++) {
+        const out = audioBuffer.getChannelData(ch);
+        for (let i = 0, j = ch; i < frames; i++, j += channels) {
+            out[i] = samples[j] / 32768;
+        }
+    }
+    scheduleAudioBuffer(audioBuffer, seq);
+}
+
+function scheduleAudioBuffer(audioBuffer, seq) {
+    const source = audioContext.createBufferSource();
+    source.buffer = audioBuffer;
+    // NOTE: playbackRate intentionally NOT set here.
+    // Changing playbackRate also changes pitch → distorted voice.
+    // Speed is controlled server-side via XTTS speed parameter (no distortion).
+    source.connect(audioContext.destination);
+
+    // ACK серверу: чанк доиграл → сервер шлёт следующий (темп задаёт клиент)
+    if (seq !== undefined) {
+        source.onended = () => {
+            if (ws && ws.readyState === WebSocket.OPEN) {
+                ws.send(JSON.stringify({ type: 'audio_done', seq: seq }));
+            }
+        };
+    }
+
+    // Scheduled queue: каждый чанк начинается ТОЧНО когда закончился предыдущий.
+    // Без этого source.start(0) = "сейчас" → перекрытие при быстрых чанках.
+    const now = audioContext.currentTime;
+    if (audioNextStartTime < now) {
+        audioNextStartTime = now + 0.05; // небольшой gap чтобы избежать щелчков
+    }
+    source.start(audioNextStartTime);
+    audioNextStartTime += audioBuffer.duration;
+}
+
 function updateMetrics(metrics) {
     // Latency метрики
     if (metrics.latency) {
@@ -313,25 +382,22 @@ async function startSession() {
             // Получаем аудио данные (Float32Array)
             const inputData = event.inputBuffer.getChannelData(0);
 
-            // Конвертируем в Int16Array (для эффективной передачи)
-            const int16Data = new Int16Array(inputData.length);
+            // Binary frame: [1 байт тега AUDIO_FRAME_TAG][PCM int16 LE]
+            // (без base64 и JSON — сервер читает байты напрямую)
+            const frame = new ArrayBuffer(1 + inputData.length * 2);
+            new Uint8Array(frame, 0, 1)[0] = AUDIO_FRAME_TAG;
+            const pcm = new DataView(frame, 1);
             for (let i = 0; i < inputData.length; i++) {
                 const s = Math.max(-1, Math.min(1, inputData[i]));
-                int16Data[i] = s < 0 ? s * 0x8000 : s * 0x7FFF;
+                pcm.setInt16(i * 2, s < 0 ? s * 0x8000 : s * 0x7FFF, true);
             }
 
-            // Отправляем на сервер (base64)
-            const base64Audio = btoa(String.fromCharCode.apply(null, new Uint8Array(int16Data.buffer)));
-
             if (chunkCount % 10 === 1) { // Log every 10th chunk
-                console.log('[AUDIO] Sending chunk #' + chunkCount + ', size:', int16Data.length, 'samples');
+                console.log('[AUDIO] Sending chunk #' + chunkCount + ', size:', inputData.length, 'samples');
             }
 
             if (ws && ws.readyState === WebSocket.OPEN) {
-                ws.send(JSON.stringify({
-                    type: 'audio',
-                    data: base64Audio
-                }));
+                ws.send(frame);
             }
         };
 